@@ -1,8 +1,14 @@
+import asyncio
+import functools
+import importlib
+import os
+import secrets
+from contextlib import asynccontextmanager
 import gradio as gr
-from demos.generate import demo as demo_generate
-from demos.compare import demo as demo_compare
-from demos.inspect_ import demo as demo_inspect
-from demos.chunker import demo as demo_chunker
+import uvicorn
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import PlainTextResponse
+from demos.options import opts
 
 custom_css = """
 .fixed-height {
@@ -84,14 +90,113 @@ iscc_theme = gr.themes.Default(
 )
 
 
-demo = gr.TabbedInterface(
-    title="▶️ ISCC Playground - The DNA of your digital content",
-    interface_list=[demo_compare, demo_generate, demo_inspect, demo_chunker],
-    tab_names=["COMPARE", "GENERATE", "INSPECT", "CHUNKER"],
-    css=custom_css,
-    # theme=iscc_theme,
-)
+def admin_authorized(request):
+    # type: (Request) -> bool
+    token = request.headers.get("authorization", "").removeprefix("Bearer ")
+    return bool(opts.admin_token) and secrets.compare_digest(token.encode(), opts.admin_token.encode())
+
+
+# Tab name -> module with the tab UI as `demo`
+TABS = {
+    "COMPARE": "demos.compare",
+    "GENERATE": "demos.generate",
+    "INSPECT": "demos.inspect_",
+    "CHUNKER": "demos.chunker",
+    "SEARCH": "demos.search",
+}
 
 
-if __name__ == "__main__":
-    demo.launch()
+@functools.lru_cache(maxsize=1)
+def create_demo(reload=False):
+    # type: (bool) -> gr.TabbedInterface
+    """
+    Build the tabbed UI (once per process).
+
+    Importing the tabs builds their UIs and opens the upload and exact-match stores. Spawned worker
+    processes, which import this module as `__mp_main__`, must not repeat it. With `reload` the tab
+    modules run again, so the reload mode of `gradio app.py` renders fresh blocks after each change.
+    """
+    modules = [importlib.import_module(name) for name in TABS.values()]
+    if reload:
+        modules = [importlib.reload(module) for module in modules]
+    demo = gr.TabbedInterface(
+        title="▶️ ISCC Playground - The DNA of your digital content",
+        interface_list=[module.demo for module in modules],
+        tab_names=list(TABS),
+        css=custom_css,
+        # theme=iscc_theme,
+    )
+
+    # Bound Gradio's own temp files (thumbnails, plots) with the same TTL as the upload store
+    demo.delete_cache = (opts.upload_ttl, opts.upload_ttl)
+
+    # Admission control happens in demos.scheduling pools, so Gradio must not hold events back itself
+    demo.queue(default_concurrency_limit=None)
+    return demo
+
+
+def create_app():
+    # type: () -> FastAPI
+    """Mount the UI in a FastAPI app with metrics, admin endpoints and background maintenance"""
+    from demos.compare import SAMPLES, iscc_semantic
+    from demos.search import corpus_roots
+    from demos.scheduling import metrics as pool_metrics
+    from demos.exact import EXACT_ISCC, EXACT_SEMANTIC
+    from demos.executor import run_blocking
+    from demos.memory import PROFILER
+    from demos.profiling import SAMPLER
+    from demos.uploads import UPLOADS
+
+    demo = create_demo(reload=False)
+
+    async def evict_uploads():
+        # Requests only evict while they acquire or release uploads, so an idle server needs this
+        while True:
+            await asyncio.sleep(max(1, min(60, opts.upload_ttl)))
+            await run_blocking(UPLOADS.evict)
+
+    @asynccontextmanager
+    async def lifespan(app):
+        # Serve COMPARE examples from precomputed results (rebuilt in the background on version changes)
+        SAMPLES.ensure(iscc_semantic)
+        evictor = asyncio.create_task(evict_uploads())
+        yield
+        evictor.cancel()
+
+    def profile(request: Request, func: str = "", reset: bool = False):
+        """Download collapsed stacks of sampled requests (flamegraph.pl / speedscope format)"""
+        if not admin_authorized(request):
+            raise HTTPException(status_code=404)
+        data = SAMPLER.collapsed(func or None)
+        if reset:
+            SAMPLER.reset()
+        filename = f"iscc-playground-{func or 'all'}.collapsed"
+        return PlainTextResponse(data, headers={"Content-Disposition": f'attachment; filename="{filename}"'})
+
+    def metrics():
+        # type: () -> str
+        exact = EXACT_ISCC.metrics("iscc") + EXACT_SEMANTIC.metrics("semantic")
+        return pool_metrics() + "\n".join(UPLOADS.metrics() + exact + PROFILER.metrics()) + "\n"
+
+    app = FastAPI(lifespan=lifespan)
+    app.add_api_route("/metrics", metrics, response_class=PlainTextResponse, include_in_schema=False)
+    app.add_api_route("/admin/profile", profile, include_in_schema=False)
+    return gr.mount_gradio_app(app, demo, path="/", allowed_paths=corpus_roots())
+
+
+if __name__ != "__mp_main__":
+    # Module-level UI for `gradio app.py` (reload mode runs this module again and looks up `demo`)
+    demo = create_demo(reload=bool(os.getenv("GRADIO_WATCH_DIRS")))
+
+
+if __name__ == "__main__" and os.getenv("GRADIO_WATCH_DIRS"):
+    # Started by `gradio app.py`: reload mode hooks into `launch`, so serve the UI alone
+    from demos.search import corpus_roots
+
+    demo.launch(allowed_paths=corpus_roots())
+elif __name__ == "__main__":
+    uvicorn.run(
+        create_app(),
+        host=os.getenv("GRADIO_SERVER_NAME", "127.0.0.1"),
+        port=int(os.getenv("GRADIO_SERVER_PORT", "7860")),
+    )
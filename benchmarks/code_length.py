@@ -0,0 +1,76 @@
+"""
+Benchmark ISCC-UNIT length: generation cost, index memory and match quality at 64, 128 and 256 bits.
+
+Every image of the first directory is matched against every image of the second. Images at the
+same position of both sorted directories show the same object (the bundled ukbench pairs). A pair
+counts as a match if the similarity of a unit reaches the threshold.
+
+Usage: python -m benchmarks.code_length [images a] [images b] [threshold]
+"""
+
+import sys
+import time
+from pathlib import Path
+import iscc_core as ic
+from demos.compare import dist_to_sim, iscc_semantic
+from demos.units import BITS, compare_units, long_units, split_units
+
+
+HERE = Path(__file__).parent.absolute()
+IMAGES1 = HERE.parent / "demos/images1"
+IMAGES2 = HERE.parent / "demos/images2"
+
+
+def collect(path):
+    # type: (Path) -> list[str]
+    return [fp.as_posix() for fp in sorted(path.iterdir()) if fp.suffix.lower() in {".jpg", ".png"}]
+
+
+def generate(files, bits):
+    # type: (list[str], int) -> tuple[list[str], float]
+    """Generate space separated units for all files and return them with seconds per file"""
+    bases = [iscc_semantic(fp).iscc for fp in files]  # 64-bit units to extend (cached, not timed)
+    start = time.perf_counter()
+    codes = [" ".join(long_units(fp, base, bits)) for fp, base in zip(files, bases)]
+    return codes, (time.perf_counter() - start) / len(files)
+
+
+def match_quality(codes_a, codes_b, threshold):
+    # type: (list[str], list[str], float) -> dict[str, tuple[float, float]]
+    """Precision and recall per unit type over all pairs (same position = same object)"""
+    counts = {}  # unit -> [true positives, false positives, false negatives]
+    for i, code_a in enumerate(codes_a):
+        for j, code_b in enumerate(codes_b):
+            for unit, sim in dist_to_sim(*compare_units(code_a, code_b)).items():
+                if unit in ("Instance", "Meta"):
+                    continue
+                tp_fp_fn = counts.setdefault(unit, [0, 0, 0])
+                if sim >= threshold:
+                    tp_fp_fn[0 if i == j else 1] += 1
+                elif i == j:
+                    tp_fp_fn[2] += 1
+    return {
+        unit: (tp / (tp + fp) if tp + fp else 0.0, tp / (tp + fn) if tp + fn else 0.0)
+        for unit, (tp, fp, fn) in sorted(counts.items())
+    }
+
+
+def main():
+    files_a = collect(Path(sys.argv[1]) if len(sys.argv) > 1 else IMAGES1)
+    files_b = collect(Path(sys.argv[2]) if len(sys.argv) > 2 else IMAGES2)
+    threshold = float(sys.argv[3]) if len(sys.argv) > 3 else 0.6
+    print(f"{len(files_a)} x {len(files_b)} images, similarity threshold {threshold}")
+    for bits in BITS:
+        codes_a, seconds = generate(files_a, bits)
+        codes_b, _ = generate(files_b, bits)
+        item_bytes = sum(ic.Code(unit).length // 8 for unit in split_units(codes_a[0]))
+        quality = match_quality(codes_a, codes_b, threshold)
+        scores = " | ".join(f"{unit} P {p:.2f} R {r:.2f}" for unit, (p, r) in quality.items())
+        print(
+            f"{bits:>3} bits | {seconds * 1000:8.1f} ms/file | "
+            f"index {item_bytes} bytes/item ({item_bytes * 10**6 / 2**20:.0f} MB per 1M) | {scores}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,309 @@
+"""
+Load test the playground through the Gradio client API.
+
+Starts `app.py` on a free local port (or targets `--url`) and runs concurrent virtual users for a
+fixed duration. Every user repeatedly picks a scenario according to the weights of `--mix`:
+
+- `generate` - upload a media file to GENERATE
+- `compare` - upload two media files to COMPARE and compare the resulting ISCCs
+- `inspect` - explain an ISCC in INSPECT
+- `chunker` - chunk and diff the sample text in CHUNKER
+
+Uploads are picked from the bundled sample images or from the files in `--media DIR`. Every upload
+is a copy with random bytes appended, so each request computes its ISCC instead of hitting the upload
+store, the exact-match store or the result cache. Pass `--cached` to upload the files unchanged and
+measure the cache hit path instead.
+
+Reports throughput, p50/p95/p99 latency and error rate per event, followed by the queue and exact-store
+metrics of the app (`/metrics`), so pool and worker settings (`ISCC_PLAYGROUND_*`) can be tuned with data.
+
+Usage: python -m benchmarks.load_test [--users 8] [--duration 60] [--mix generate=1,compare=1,inspect=4,chunker=4]
+                                      [--media DIR] [--cached]
+"""
+
+import argparse
+import os
+import random
+import socket
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from collections import defaultdict
+from pathlib import Path
+from statistics import quantiles
+from gradio_client import Client, handle_file
+from demos.serialize import dumps
+
+
+HERE = Path(__file__).parent.absolute()
+ROOT = HERE.parent
+SAMPLE_TEXT = (ROOT / "demos/samples/sample.txt").read_text(encoding="utf-8")
+SAMPLE_ISCC = "ISCC:KECYCMZIOY36XXGZ7S6QJQ2AEEXPOVEHZYPK6GMSFLU3WF54UPZMTPY"
+MEDIA = (ROOT / "demos/images1", ROOT / "demos/images2")
+
+
+def media_files(folders):
+    # type: (list[Path]) -> list[str]
+    """Files in `folders` and their subfolders (hidden files skipped)"""
+    files = sorted(
+        fp.as_posix()
+        for folder in folders
+        for fp in Path(folder).rglob("*")
+        if fp.is_file() and not fp.name.startswith(".")
+    )
+    if not files:
+        raise ValueError(f"No media files found in {', '.join(map(str, folders))}")
+    return files
+
+
+class MediaPicker:
+    """Picks files to upload, by default as unique copies that no content cache has seen before"""
+
+    def __init__(self, files, folder, rnd, unique=True):
+        # type: (list[str], str, random.Random, bool) -> None
+        self.files = files
+        self.folder = Path(folder)
+        self.rnd = rnd
+        self.unique = unique
+
+    def pick(self, count=1):
+        # type: (int) -> list[str]
+        """Pick `count` distinct files (fewer files are reused) and return the paths to upload"""
+        if count <= len(self.files):
+            picked = self.rnd.sample(self.files, count)
+        else:
+            picked = self.rnd.choices(self.files, k=count)
+        if not self.unique:
+            return picked
+        copies = []
+        for slot, filepath in enumerate(picked):
+            # Same filename (the Meta-Code depends on it), one folder per slot of the request
+            target = self.folder / str(slot) / Path(filepath).name
+            target.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(filepath, target)
+            with open(target, "ab") as outf:
+                # Decoders ignore trailing bytes after the media data
+                outf.write(self.rnd.randbytes(16))
+            copies.append(target.as_posix())
+        return copies
+
+
+class Recorder:
+    """Thread-safe latency and error bookkeeping per event"""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)  # type: dict[str, list[float]]
+        self.errors = defaultdict(int)  # type: dict[str, int]
+        self.samples = defaultdict(str)  # type: dict[str, str] - last error message per event
+        self._lock = threading.Lock()
+
+    def call(self, event, func, *args, **kwargs):
+        """Run and record one request, return its result or None on error"""
+        start = time.perf_counter()
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            with self._lock:
+                self.errors[event] += 1
+                self.latencies[event].append(time.perf_counter() - start)
+                self.samples[event] = f"{type(e).__name__}: {e}"[:120]
+            return None
+        with self._lock:
+            self.latencies[event].append(time.perf_counter() - start)
+        return result
+
+    def report(self, seconds):
+        # type: (float) -> list[dict]
+        rows = []
+        for event, latencies in sorted(self.latencies.items()):
+            cuts = quantiles(latencies, n=100, method="inclusive") if len(latencies) >= 2 else latencies * 99
+            rows.append(
+                dict(
+                    event=event,
+                    requests=len(latencies),
+                    throughput=len(latencies) / seconds,
+                    p50=cuts[49],
+                    p95=cuts[94],
+                    p99=cuts[98],
+                    error_rate=self.errors[event] / len(latencies),
+                    last_error=self.samples[event] or None,
+                )
+            )
+        return rows
+
+
+def scenario_generate(client, recorder, rnd, media):
+    (filepath,) = media.pick()
+    recorder.call("generate", client.predict, handle_file(filepath), 64, api_name="/generate_iscc")
+
+
+def scenario_compare(client, recorder, rnd, media):
+    file_a, file_b = media.pick(2)
+    result_a = recorder.call(
+        "compare_upload", client.predict, handle_file(file_a), 64, api_name="/process_upload_a"
+    )
+    result_b = recorder.call(
+        "compare_upload", client.predict, handle_file(file_b), 64, api_name="/process_upload_b"
+    )
+    if result_a and result_b:
+        recorder.call("compare", client.predict, result_a[2], result_b[2], api_name="/iscc_compare")
+
+
+def scenario_inspect(client, recorder, rnd, media):
+    recorder.call("inspect", client.predict, SAMPLE_ISCC, api_name="/explain_iscc")
+
+
+def scenario_chunker(client, recorder, rnd, media):
+    cut = rnd.randrange(len(SAMPLE_TEXT))
+    edited = SAMPLE_TEXT[:cut] + "edit " + SAMPLE_TEXT[cut:]
+    recorder.call("chunk_text", client.predict, edited, 64, api_name="/chunk_text")
+    recorder.call("diff_text", client.predict, SAMPLE_TEXT, edited, 64, api_name="/diff_text")
+
+
+SCENARIOS = dict(
+    generate=scenario_generate,
+    compare=scenario_compare,
+    inspect=scenario_inspect,
+    chunker=scenario_chunker,
+)
+
+
+def parse_mix(mix):
+    # type: (str) -> dict[str, float]
+    weights = {}
+    for item in mix.split(","):
+        name, _, weight = item.partition("=")
+        if name not in SCENARIOS:
+            raise ValueError(f"Unknown scenario {name!r} - use one of {list(SCENARIOS)}")
+        weights[name] = float(weight or 1)
+    return weights
+
+
+def virtual_user(url, weights, deadline, recorder, seed, files, unique):
+    rnd = random.Random(seed)
+    client = Client(url, verbose=False)
+    names, values = list(weights), list(weights.values())
+    with tempfile.TemporaryDirectory(prefix="iscc-load-") as folder:
+        media = MediaPicker(files, folder, rnd, unique=unique)
+        while time.monotonic() < deadline:
+            SCENARIOS[rnd.choices(names, values)[0]](client, recorder, rnd, media)
+
+
+def free_port():
+    # type: () -> int
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def launch_app(port, timeout=120):
+    # type: (int, float) -> subprocess.Popen
+    """Start app.py on a local port and wait until it serves requests"""
+    env = dict(os.environ, GRADIO_SERVER_NAME="127.0.0.1", GRADIO_SERVER_PORT=str(port))
+    process = subprocess.Popen([sys.executable, "app.py"], cwd=ROOT, env=env)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"App exited with code {process.returncode}")
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/config", timeout=2)
+            return process
+        except OSError:
+            time.sleep(0.5)
+    stop_app(process)
+    raise RuntimeError(f"App did not start within {timeout}s")
+
+
+def stop_app(process, timeout=10):
+    # type: (subprocess.Popen, float) -> None
+    """Terminate the launched app and kill it if it does not shut down in time"""
+    process.terminate()
+    try:
+        process.wait(timeout)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the ISCC playground")
+    parser.add_argument("--url", help="Target a running app instead of launching one")
+    parser.add_argument("--users", type=int, default=8, help="Concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=60, help="Test duration in seconds")
+    parser.add_argument("--mix", default="generate=1,compare=1,inspect=4,chunker=4", help="Scenario weights")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed of the first user")
+    parser.add_argument(
+        "--media", action="append", type=Path, help="Upload files from this folder (repeatable)"
+    )
+    parser.add_argument("--cached", action="store_true", help="Upload files unchanged (measures cache hits)")
+    parser.add_argument("--report", help="Write the report as JSON to this file")
+    args = parser.parse_args()
+    weights = parse_mix(args.mix)
+    files = media_files(args.media or MEDIA)
+
+    process = None
+    url = args.url
+    if not url:
+        port = free_port()
+        process = launch_app(port)
+        url = f"http://127.0.0.1:{port}/"
+    try:
+        recorder = Recorder()
+        start = time.monotonic()
+        deadline = start + args.duration
+        users = [
+            threading.Thread(
+                target=virtual_user,
+                args=(url, weights, deadline, recorder, args.seed + i, files, not args.cached),
+            )
+            for i in range(args.users)
+        ]
+        for user in users:
+            user.start()
+        for user in users:
+            user.join()
+        seconds = time.monotonic() - start
+        try:
+            app_metrics = urllib.request.urlopen(url.rstrip("/") + "/metrics", timeout=5).read().decode()
+        except OSError:
+            app_metrics = ""
+    finally:
+        if process is not None:
+            stop_app(process)
+
+    rows = recorder.report(seconds)
+    uploads = "cached" if args.cached else "unique"
+    print(f"{args.users} users, {seconds:.0f}s, mix {args.mix}, {len(files)} media files ({uploads} uploads)")
+    print(f"{'event':<16} {'requests':>8} {'req/s':>7} {'p50':>8} {'p95':>8} {'p99':>8} {'errors':>7}")
+    for row in rows:
+        print(
+            f"{row['event']:<16} {row['requests']:>8} {row['throughput']:>7.2f} "
+            f"{row['p50']:>7.2f}s {row['p95']:>7.2f}s {row['p99']:>7.2f}s {row['error_rate']:>7.1%}"
+        )
+    for row in rows:
+        if row["last_error"]:
+            print(f"{row['event']}: {row['last_error']}")
+    queue_metrics = [
+        line for line in app_metrics.splitlines() if line.startswith(("iscc_pool_", "iscc_exact_"))
+    ]
+    if queue_metrics:
+        print("\n" + "\n".join(queue_metrics))
+    if args.report:
+        report = dict(
+            users=args.users,
+            seconds=seconds,
+            mix=weights,
+            media=len(files),
+            unique=not args.cached,
+            events=rows,
+            app_metrics=queue_metrics,
+        )
+        Path(args.report).write_bytes(dumps(report, pretty=True))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Verify semantic model variants against the reference model on the sample sets.
+
+Reports per variant the Hamming drift of 64-bit Semantic-Codes against the reference model
+(mean / max bits and share of identical codes), the mean inference latency per image and the RSS
+growth for loading the model and running it. Thread counts follow the configured options
+(`ISCC_PLAYGROUND_SEMANTIC_INTRA_THREADS` / `ISCC_PLAYGROUND_SEMANTIC_INTER_THREADS`).
+
+Usage: python -m benchmarks.semantic_variants [image directory] [rounds]
+"""
+
+import sys
+import time
+from pathlib import Path
+import numpy as np
+from demos.memory import current_rss
+from demos.semantic import VARIANTS, embed_batch, preprocess_file
+from benchmarks.semantic_batch import IMAGES, collect
+
+
+def binarize(features):
+    # type: (np.ndarray) -> np.ndarray
+    """First 64 sign bits of every feature vector (same bits as the 64-bit Semantic-Code)"""
+    return features[:, :64] >= 0
+
+
+def main():
+    files = collect([Path(sys.argv[1])] if len(sys.argv) > 1 else IMAGES)
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    inputs = [preprocess_file(fp) for fp in files]
+    print(f"{len(files)} images, {rounds} rounds")
+    print(f"{'variant':<10} {'latency':>10} {'rss':>9} {'mean drift':>11} {'max drift':>10} {'identical':>10}")
+    reference = None
+    for variant in VARIANTS:
+        rss = current_rss()
+        try:
+            embed_batch(inputs[0], variant)  # Load (and on first use convert) the model
+        except RuntimeError as e:
+            print(f"{variant:<10} skipped: {e}")
+            continue
+        start = time.perf_counter()
+        for _ in range(rounds):
+            features = np.concatenate([embed_batch(arr, variant) for arr in inputs])
+        latency = (time.perf_counter() - start) / (rounds * len(inputs))
+        rss_growth = current_rss() - rss
+        bits = binarize(features)
+        if reference is None:
+            reference = bits
+        drift = (bits != reference).sum(axis=1)
+        print(
+            f"{variant:<10} {latency * 1000:8.1f}ms {rss_growth / 2**20:6.0f} MB "
+            f"{drift.mean():9.2f}b {drift.max():9d}b {np.mean(drift == 0):9.0%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
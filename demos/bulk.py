@@ -0,0 +1,222 @@
+"""Checkpointed, resumable bulk ISCC generation.
+
+Every file below a directory is processed with `code_iscc` (as in the GENERATE tab) in a process
+pool. Each result is appended to the result store as soon as it is ready, keyed by path, size and
+modification time. On restart files with a stored result are skipped and failed files are retried
+until they used up their attempt budget. Modified files get a new key and are processed again.
+Results also fill the shared result cache, unless it is the per-process memory cache.
+
+The store format follows the file extension:
+
+- `*.jsonl` - append-only JSON lines (the last record for a key wins)
+- `*.db` / `*.sqlite` - SQLite table `iscc_results`
+
+Usage: python -m demos.bulk <directory> <results.jsonl|results.db> [--workers N] [--attempts N]
+"""
+
+import argparse
+import os
+import sqlite3
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+import orjson
+from loguru import logger as log
+from demos.executor import bounded_submit
+from demos.options import opts
+from demos.serialize import dumps
+
+
+__all__ = [
+    "file_key",
+    "JsonlStore",
+    "SqliteStore",
+    "open_store",
+    "run_bulk",
+]
+
+
+def file_key(filepath):
+    # type: (str) -> str
+    """Identify a file version by path, size and modification time"""
+    stat = os.stat(filepath)
+    return f"{filepath}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+class JsonlStore:
+    """Append-only JSON lines result store"""
+
+    def __init__(self, path):
+        # type: (str|Path) -> None
+        self.path = Path(path)
+        self.records = {}  # type: dict[str, dict]
+        if self.path.exists():
+            end = 0  # End of the last complete line
+            with self.path.open("rb") as infile:
+                for line in infile:
+                    if not line.endswith(b"\n"):
+                        break
+                    end += len(line)
+                    try:
+                        record = orjson.loads(line)
+                    except orjson.JSONDecodeError:
+                        continue
+                    self.records[record["key"]] = record
+            if end < self.path.stat().st_size:
+                # Cut a partial last line after a crash so the next record starts on a fresh line
+                log.warning(f"Truncating partial record at the end of {self.path}")
+                os.truncate(self.path, end)
+        self._file = self.path.open("ab")
+
+    def get(self, key):
+        # type: (str) -> dict|None
+        return self.records.get(key)
+
+    def put(self, record):
+        # type: (dict) -> None
+        self.records[record["key"]] = record
+        self._file.write(dumps(record) + b"\n")
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class SqliteStore:
+    """SQLite result store with one row per file version"""
+
+    def __init__(self, path):
+        # type: (str|Path) -> None
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS iscc_results (key TEXT PRIMARY KEY, record BLOB)")
+
+    def get(self, key):
+        # type: (str) -> dict|None
+        row = self.conn.execute("SELECT record FROM iscc_results WHERE key = ?", (key,)).fetchone()
+        return orjson.loads(row[0]) if row else None
+
+    def put(self, record):
+        # type: (dict) -> None
+        with self.conn:
+            self.conn.execute("REPLACE INTO iscc_results VALUES (?, ?)", (record["key"], dumps(record)))
+
+    def close(self):
+        self.conn.close()
+
+
+def open_store(path):
+    # type: (str|Path) -> JsonlStore|SqliteStore
+    """Open result store according to file extension"""
+    if Path(path).suffix in (".db", ".sqlite"):
+        return SqliteStore(path)
+    return JsonlStore(path)
+
+
+def generate(filepath):
+    # type: (str) -> tuple[dict|None, str|None]
+    """Generate ISCC metadata in a worker process"""
+    import iscc_sdk as idk
+    from demos.cache import CACHE
+    from demos.extended import code_iscc
+
+    # Filling a per-process cache would cost a content hash per file that no later request can hit
+    func = code_iscc if CACHE is not None and CACHE.shared else idk.code_iscc
+    try:
+        return func(filepath).dict(), None
+    except Exception as e:
+        return None, f"{type(e).__name__}: {e}"
+
+
+def submit_task(pool, task):
+    # type: (ProcessPoolExecutor, tuple[str, str, int]) -> Future
+    """Submit a (filepath, key, attempts) task to the worker pool"""
+    return pool.submit(generate, task[0])
+
+
+def run_bulk(path, store, workers=None, attempts=3):
+    # type: (str|Path, JsonlStore|SqliteStore, int|None, int) -> dict
+    """
+    Process all files below `path` that have no stored result yet.
+
+    :param path: Directory to scan recursively
+    :param store: Result store for checkpointing
+    :param workers: Number of worker processes
+    :param attempts: Max attempts per file version (including earlier runs)
+    :return: Counts of processed, skipped, failed and exhausted files
+    """
+    todo, stats = [], dict(done=0, failed=0, skipped=0, exhausted=0)
+    for fp in sorted(Path(path).rglob("*")):
+        if not fp.is_file():
+            continue
+        key = file_key(fp.as_posix())
+        record = store.get(key)
+        if record is None:
+            todo.append((fp.as_posix(), key, 0))
+        elif record["status"] == "ok":
+            stats["skipped"] += 1
+        elif record["attempts"] < attempts:
+            todo.append((fp.as_posix(), key, record["attempts"]))
+        else:
+            stats["exhausted"] += 1
+    workers = workers or opts.executor_workers
+    log.info(f"{len(todo)} files to process with {workers} workers ({stats['skipped']} done before)")
+
+    start = last_report = time.perf_counter()
+    total = len(todo)
+    queue = deque(todo)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        submit = partial(submit_task, pool)
+        for (filepath, key, tried), future in bounded_submit(submit, queue, workers * 4):
+            tried += 1
+            metadata, error = future.result()
+            store.put(
+                dict(
+                    key=key,
+                    path=filepath,
+                    status="ok" if error is None else "error",
+                    attempts=tried,
+                    metadata=metadata,
+                    error=error,
+                )
+            )
+            if error is None:
+                stats["done"] += 1
+            elif tried < attempts:
+                log.warning(f"Attempt {tried} failed for {filepath}: {error}")
+                queue.append((filepath, key, tried))
+            else:
+                stats["failed"] += 1
+                log.error(f"Giving up on {filepath} after {tried} attempts: {error}")
+            now = time.perf_counter()
+            finished_files = stats["done"] + stats["failed"]
+            if now - last_report >= 5 or finished_files == total:
+                rate = finished_files / (now - start)
+                eta = (total - finished_files) / rate if rate else 0
+                log.info(
+                    f"{finished_files}/{total} files | {rate:.1f} files/s | "
+                    f"{stats['failed']} failed | ETA {eta:.0f}s"
+                )
+                last_report = now
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Resumable bulk ISCC generation")
+    parser.add_argument("path", help="Directory to scan recursively")
+    parser.add_argument("store", help="Result store (.jsonl or .db/.sqlite)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Worker processes")
+    parser.add_argument("--attempts", type=int, default=3, help="Max attempts per file")
+    args = parser.parse_args()
+    store = open_store(args.store)
+    try:
+        stats = run_bulk(args.path, store, workers=args.workers, attempts=args.attempts)
+    finally:
+        store.close()
+    log.info(f"Finished: {stats}")
+
+
+if __name__ == "__main__":
+    main()
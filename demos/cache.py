@@ -0,0 +1,367 @@
+"""Pluggable result cache for ISCC metadata keyed by content digest.
+
+Backends are selected with `ISCC_PLAYGROUND_CACHE_URL`:
+
+- `memory://` - per-process LRU cache (default)
+- `sqlite:///path/to/cache.db` - file cache shared by all processes that can reach the file (bounded
+  by `ISCC_PLAYGROUND_CACHE_SQLITE_BUDGET_MB` and `ISCC_PLAYGROUND_CACHE_TTL`)
+- `redis://host:port/db` - any server speaking the Redis protocol, shared across nodes
+
+Run `python -m demos.cache [port]` to start a minimal Redis-protocol stand-in for local testing.
+"""
+
+import functools
+import socket
+import socketserver
+import sqlite3
+import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from os.path import basename
+from urllib.parse import urlparse
+import orjson
+from blake3 import blake3
+from loguru import logger as log
+import iscc_core as ic
+import iscc_sdk as idk
+import iscc_sci as sci
+from demos.options import opts
+from demos.serialize import dumps
+
+
+__all__ = [
+    "CacheBackend",
+    "MemoryCache",
+    "SqliteCache",
+    "RedisCache",
+    "cache_from_url",
+    "content_digest",
+    "cached",
+    "CACHE",
+]
+
+VERSIONS = f"{ic.__version__}-{idk.__version__}-{sci.__version__}"
+
+
+class CacheBackend(ABC):
+    """Interface for byte-valued result caches"""
+
+    shared = True  # Visible to other processes
+
+    @abstractmethod
+    def get(self, key):
+        # type: (str) -> bytes|None
+        """Return cached value or None"""
+
+    @abstractmethod
+    def set(self, key, value):
+        # type: (str, bytes) -> None
+        """Store value under key"""
+
+
+class MemoryCache(CacheBackend):
+    """Thread-safe in-process LRU cache"""
+
+    shared = False
+
+    def __init__(self, max_items=1024):
+        # type: (int) -> None
+        self.max_items = max_items
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_items:
+                self._data.popitem(last=False)
+
+
+class SqliteCache(CacheBackend):
+    """
+    SQLite file cache shared between processes (WAL mode, one connection per thread).
+
+    Entries unused for `ttl` seconds (0 = never) are dropped and least recently used entries are
+    evicted while the file holds more than `budget` bytes of values. Eviction runs every
+    `evict_every` writes of a process, so concurrent writers don't scan the table on every set.
+    """
+
+    def __init__(self, path, budget=0, ttl=0, evict_every=64):
+        # type: (str, int, int, int) -> None
+        self.path = path
+        self.budget = budget
+        self.ttl = ttl
+        self.evict_every = evict_every
+        self.evictions = 0
+        self._writes = 0
+        self._local = threading.local()
+        conn = self._conn()
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(iscc_cache)")}
+        if columns and "last_access" not in columns:
+            conn.execute("DROP TABLE iscc_cache")  # Cache file from before eviction support
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS iscc_cache (key TEXT PRIMARY KEY, value BLOB, size INTEGER, last_access REAL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS iscc_cache_last_access ON iscc_cache (last_access)")
+
+    def _conn(self):
+        # type: () -> sqlite3.Connection
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        conn = self._conn()
+        row = conn.execute("SELECT value, last_access FROM iscc_cache WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        now = time.time()
+        if self.ttl and row[1] < now - self.ttl:
+            return None
+        conn.execute("UPDATE iscc_cache SET last_access = ? WHERE key = ?", (now, key))
+        return row[0]
+
+    def set(self, key, value):
+        self._conn().execute(
+            "INSERT OR REPLACE INTO iscc_cache (key, value, size, last_access) VALUES (?, ?, ?, ?)",
+            (key, value, len(value), time.time()),
+        )
+        self._writes += 1
+        if self._writes % self.evict_every == 0:
+            self.evict()
+
+    def evict(self):
+        # type: () -> int
+        """Drop expired entries, then least recently used entries down to 90% of the budget"""
+        conn = self._conn()
+        evicted = 0
+        if self.ttl:
+            evicted += conn.execute(
+                "DELETE FROM iscc_cache WHERE last_access < ?", (time.time() - self.ttl,)
+            ).rowcount
+        if self.budget:
+            usage = conn.execute("SELECT COALESCE(SUM(size), 0) FROM iscc_cache").fetchone()[0]
+            if usage > self.budget:
+                excess, keys = usage - self.budget * 0.9, []
+                for key, size in conn.execute("SELECT key, size FROM iscc_cache ORDER BY last_access"):
+                    if excess <= 0:
+                        break
+                    keys.append((key,))
+                    excess -= size
+                conn.executemany("DELETE FROM iscc_cache WHERE key = ?", keys)
+                evicted += len(keys)
+        if evicted:
+            self.evictions += evicted
+            log.debug(f"Evicted {evicted} entries from SQLite cache {self.path}")
+        return evicted
+
+
+class RedisCache(CacheBackend):
+    """Minimal Redis-protocol (RESP2) client cache, one connection per thread"""
+
+    def __init__(self, host="127.0.0.1", port=6379, db=0, ttl=0, timeout=2.0):
+        # type: (str, int, int, int, float) -> None
+        self.host = host
+        self.port = port
+        self.db = db
+        self.ttl = ttl
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connect(self):
+        sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        self._local.sock = sock
+        self._local.reader = sock.makefile("rb")
+        if self.db:
+            self._send("SELECT", str(self.db))
+
+    def _send(self, *args):
+        # type: (str|bytes) -> bytes|int|list|None
+        parts = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            arg = arg if isinstance(arg, bytes) else arg.encode("utf-8")
+            parts.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+        self._local.sock.sendall(b"".join(parts))
+        return read_reply(self._local.reader)
+
+    def _command(self, *args):
+        if getattr(self._local, "sock", None) is None:
+            self._connect()
+        try:
+            return self._send(*args)
+        except OSError:
+            # Reconnect once on a stale connection
+            self._connect()
+            return self._send(*args)
+
+    def get(self, key):
+        return self._command("GET", key)
+
+    def set(self, key, value):
+        if self.ttl:
+            self._command("SET", key, value, "EX", str(self.ttl))
+        else:
+            self._command("SET", key, value)
+
+
+def read_reply(reader):
+    # type: (io.BufferedReader) -> bytes|int|list|None
+    """Read one RESP2 reply from a buffered socket reader"""
+    line = reader.readline()
+    if not line:
+        raise ConnectionError("Connection closed by server")
+    kind, payload = line[:1], line[1:-2]
+    if kind == b"+":
+        return payload
+    if kind == b"-":
+        raise RuntimeError(payload.decode("utf-8", "replace"))
+    if kind == b":":
+        return int(payload)
+    if kind == b"$":
+        size = int(payload)
+        if size == -1:
+            return None
+        data = reader.read(size + 2)
+        return data[:-2]
+    if kind == b"*":
+        size = int(payload)
+        return None if size == -1 else [read_reply(reader) for _ in range(size)]
+    raise ValueError(f"Invalid RESP reply {line!r}")
+
+
+def cache_from_url(url):
+    # type: (str) -> CacheBackend|None
+    """Create cache backend from URL (empty URL disables caching)"""
+    if not url:
+        return None
+    parsed = urlparse(url)
+    if parsed.scheme == "memory":
+        return MemoryCache(max_items=opts.cache_memory_items)
+    if parsed.scheme == "sqlite":
+        if parsed.netloc or not parsed.path:
+            raise ValueError(f"Invalid SQLite cache URL {url} - use sqlite:///path/to/cache.db")
+        return SqliteCache(parsed.path, budget=opts.cache_sqlite_budget_mb * 1024 * 1024, ttl=opts.cache_ttl)
+    if parsed.scheme == "redis":
+        db = int(parsed.path.strip("/") or 0)
+        return RedisCache(parsed.hostname or "127.0.0.1", parsed.port or 6379, db, ttl=opts.cache_ttl)
+    raise ValueError(f"Unsupported cache URL {url}")
+
+
+CACHE = cache_from_url(opts.cache_url)
+
+
+def content_digest(filepath):
+    # type: (str) -> str
+    """Calculate blake3 hex digest of file content"""
+    hasher = blake3()
+    with open(filepath, "rb") as infile:
+        data = infile.read(ic.core_opts.io_read_size)
+        while data:
+            hasher.update(data)
+            data = infile.read(ic.core_opts.io_read_size)
+    return hasher.hexdigest()
+
+
+def cached(kind):
+    """
+    Decorate a `filepath -> IsccMeta` function with the shared result cache.
+
+    The Meta-Code falls back to the filename if a file has no embedded title, so the key combines
+    the content digest with the file name, the keyword arguments and the library versions. Callers
+    that already hashed the file pass its `digest` to skip hashing it again.
+    """
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(filepath, digest=None, **kwargs):
+            if CACHE is None:
+                return func(filepath, **kwargs)
+            params = ",".join(f"{k}={v}" for k, v in sorted(kwargs.items()))
+            digest = digest or content_digest(filepath)
+            key = f"iscc:{kind}:{VERSIONS}:{digest}:{basename(filepath)}:{params}"
+            try:
+                data = CACHE.get(key)
+            except Exception as e:
+                log.warning(f"Cache lookup failed: {e}")
+                data = None
+            if data is not None:
+                log.debug(f"Cache hit for {key}")
+                return idk.IsccMeta.construct(**orjson.loads(data))
+            imeta = func(filepath, **kwargs)
+            try:
+                CACHE.set(key, dumps(imeta.dict()))
+            except Exception as e:
+                log.warning(f"Cache store failed: {e}")
+            return imeta
+
+        return wrapper
+
+    return decorator
+
+
+class RespStandIn(socketserver.ThreadingTCPServer):
+    """In-memory Redis-protocol stand-in server for local testing (GET/SET/DEL/SELECT/PING/FLUSHDB)"""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address):
+        super().__init__(address, RespHandler)
+        self.data = {}
+        self.lock = threading.Lock()
+
+
+class RespHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        while True:
+            try:
+                args = read_reply(self.rfile)
+            except (ConnectionError, ValueError):
+                return
+            self.wfile.write(self.execute([arg.upper() if i == 0 else arg for i, arg in enumerate(args)]))
+
+    def execute(self, args):
+        # type: (list[bytes]) -> bytes
+        server = self.server  # type: RespStandIn
+        cmd = args[0]
+        with server.lock:
+            if cmd == b"PING":
+                return b"+PONG\r\n"
+            if cmd == b"SELECT":
+                return b"+OK\r\n"
+            if cmd == b"FLUSHDB":
+                server.data.clear()
+                return b"+OK\r\n"
+            if cmd == b"GET":
+                value, expires = server.data.get(args[1], (None, None))
+                if value is None or (expires and expires < time.time()):
+                    return b"$-1\r\n"
+                return b"$%d\r\n%s\r\n" % (len(value), value)
+            if cmd == b"SET":
+                expires = time.time() + int(args[4]) if len(args) > 4 and args[3].upper() == b"EX" else None
+                server.data[args[1]] = (args[2], expires)
+                return b"+OK\r\n"
+            if cmd == b"DEL":
+                return b":%d\r\n" % sum(server.data.pop(key, None) is not None for key in args[1:])
+        return b"-ERR unknown command\r\n"
+
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 6379
+    with RespStandIn(("127.0.0.1", port)) as server:
+        log.info(f"Redis-protocol stand-in listening on 127.0.0.1:{port}")
+        server.serve_forever()
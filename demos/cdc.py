@@ -0,0 +1,201 @@
+"""Vectorized content-defined chunking of binary data, compatible with `ic.alg_cdc_chunks`.
+
+The gear rolling hash `p = (p >> 1) + gear[byte]` is sequential, but two runs of it over the
+same bytes usually converge to the same value once their different start states are shifted out
+(within ~32 bytes, as all gear values are below 2**31). This is used twice:
+
+1. The reference pattern of a whole block is computed in many independent lanes at once with
+   NumPy. Each lane starts from zero and is then continued from the end of the previous lane
+   until both runs agree. Where a lane never agrees (long runs of one repeated byte can keep two
+   runs exactly one apart) the reference has a break at the start of the next lane.
+2. Per chunk, the pattern restarts at zero at `start + min_size`. It is computed in Python only
+   until it agrees with the reference pattern. The cut point is then the first reference
+   position that matches the small or large mask, found by bisecting precomputed candidate
+   positions. At a reference break the chunk-local pattern is carried over and synced again.
+"""
+
+import os
+import time
+from bisect import bisect_left
+import numpy as np
+import xxhash
+import iscc_core as ic
+from iscc_core.cdc import alg_cdc_params
+
+
+__all__ = [
+    "GearPatterns",
+    "cdc_offsets",
+    "minhash_256",
+    "chunk_file",
+]
+
+GEAR = np.array(ic.core_opts.cdc_gear, dtype=np.uint32)
+LANE_SIZE = 2048
+BLOCK_SIZE = 16 * 1024 * 1024
+SYNC_WINDOW = 64
+EMPTY = np.empty(0, dtype=np.uint8)
+MPRIME, MAXH = np.uint64(ic.minhash.MPRIME), np.uint64(ic.minhash.MAXH)
+PERMUTATIONS = [(np.uint64(a), np.uint64(b)) for a, b in zip(ic.minhash.MPA, ic.minhash.MPB)]
+
+
+class GearPatterns:
+    """Gear hash pattern after each byte of a block, stored lane-transposed as (position in lane, lane)"""
+
+    def __init__(self, data, state=0):
+        # type: (np.ndarray, int) -> None
+        self.size = len(data)
+        self.width = width = max(8, -(-LANE_SIZE // 8) * 8)
+        self.lanes = lanes = max(1, -(-self.size // width))
+        padded = np.zeros(lanes * width, dtype=np.uint8)
+        padded[: self.size] = data
+        # Transpose lanes in 8-byte words first, which is much faster than a bytewise transpose
+        words = np.ascontiguousarray(padded.view(np.uint64).reshape(lanes, width // 8).T)
+        columns = words.view(np.uint8).reshape(width // 8, lanes, 8).transpose(0, 2, 1).reshape(width, lanes)
+        gear = GEAR[columns]
+        out = np.empty_like(gear)
+        pattern = np.zeros(lanes, dtype=np.uint32)
+        pattern[0] = state
+        for col in range(width):
+            np.right_shift(pattern, 1, out=pattern)
+            np.add(pattern, gear[col], out=pattern)
+            out[col] = pattern
+        # Continue every lane from the end of the previous one until it agrees with its own run
+        synced = np.zeros(lanes - 1, dtype=bool)
+        pattern = out[-1, :-1].copy()
+        for col in range(width if lanes > 1 else 0):
+            np.right_shift(pattern, 1, out=pattern)
+            np.add(pattern, gear[col, 1:], out=pattern)
+            synced |= pattern == out[col, 1:]
+            if synced.all():
+                break
+            out[col, 1:] = pattern
+        # Lanes that never agreed now end differently, so the following lane starts with a break
+        self.breaks = [(int(lane) + 2) * width for lane in np.flatnonzero(~synced) if lane + 2 < lanes]
+        self.out = out
+
+    def values(self, start, stop):
+        # type: (int, int) -> list[int]
+        """Patterns at block positions `start:stop`"""
+        lane, col = divmod(start, self.width)
+        if col + stop - start <= self.width:
+            return self.out[col : col + stop - start, lane].tolist()
+        positions = np.arange(start, stop)
+        return self.out[positions % self.width, positions // self.width].tolist()
+
+    def candidates(self, mask):
+        # type: (int) -> list[int]
+        """Sorted block positions where `pattern & mask == 0`"""
+        hits = np.flatnonzero((self.out & np.uint32(mask)) == 0)
+        positions = np.sort(hits % self.lanes * self.width + hits // self.lanes)
+        return positions[positions < self.size].tolist()
+
+
+def cdc_offsets(data, avg_chunk_size=ic.core_opts.data_avg_chunk_size):
+    # type: (np.ndarray, int) -> list[int]
+    """Return the end offsets of all chunks `ic.alg_cdc_chunks(data, utf32=False)` would yield"""
+    mi, ma, cs, mask_s, mask_l = alg_cdc_params(avg_chunk_size)
+    size = len(data)
+    gear = ic.core_opts.cdc_gear
+    offsets, start, state = [], 0, 0
+    block_start = 0
+    while start < size:
+        # Reference patterns for the next block (plus one max chunk of lookahead)
+        block_end = min(size, max(start, block_start + BLOCK_SIZE) + ma)
+        patterns = GearPatterns(np.asarray(data[block_start:block_end]), state)
+        candidates_s = [pos + block_start for pos in patterns.candidates(mask_s)]
+        candidates_l = [pos + block_start for pos in patterns.candidates(mask_l)]
+        breaks = [pos + block_start for pos in patterns.breaks]
+        limit = block_end if block_end == size else block_end - ma
+        while start < size and start < limit:
+            i, center, barrier = min(start + mi, size), min(start + cs, size), min(start + ma, size)
+            pattern, cut = 0, None
+            while cut is None and i < barrier:
+                # Chunk-local pattern until it equals the reference pattern
+                synced = False
+                while not synced and cut is None and i < barrier:
+                    window = min(i + SYNC_WINDOW, barrier)
+                    reference = patterns.values(i - block_start, window - block_start)
+                    for byte, ref in zip(data[i:window].tobytes(), reference):
+                        previous, pattern = pattern, (pattern >> 1) + gear[byte]
+                        if not pattern & (mask_s if i < center else mask_l):
+                            cut = i + 1
+                            break
+                        i += 1
+                        if pattern == ref:
+                            synced = True
+                            break
+                        if pattern == previous and i < barrier:
+                            # Fixed point in a run of one byte value: skip to the end of the run
+                            other = np.flatnonzero(np.asarray(data[i:barrier]) != byte)
+                            run_end = i + int(other[0]) if len(other) else barrier
+                            if i < center and not pattern & mask_s:
+                                cut = i + 1
+                            elif run_end > center and not pattern & mask_l:
+                                cut = max(i, center) + 1
+                            i = run_end
+                            break
+                if not synced:
+                    break
+                # Synced: first reference match of the small mask before center, else of the large mask
+                pos = bisect_left(breaks, i)
+                end = min(barrier, breaks[pos]) if pos < len(breaks) else barrier
+                if i < center:
+                    pos = bisect_left(candidates_s, i)
+                    if pos < len(candidates_s) and candidates_s[pos] < min(center, end):
+                        cut = candidates_s[pos] + 1
+                if cut is None and end > center:
+                    pos = bisect_left(candidates_l, max(i, center))
+                    if pos < len(candidates_l) and candidates_l[pos] < end:
+                        cut = candidates_l[pos] + 1
+                if cut is None and end < barrier:
+                    # Reference break: continue the chunk-local pattern from the last synced position
+                    pattern = patterns.values(end - 1 - block_start, end - block_start)[0]
+                    i = end
+                elif cut is None:
+                    i = barrier
+            offsets.append(cut or barrier)
+            start = cut or barrier
+        if start >= size:
+            break
+        state = patterns.values(limit - 1 - block_start, limit - block_start)[0]
+        block_start = limit
+    return offsets
+
+
+def minhash_256(features):
+    # type: (list[int]) -> bytes
+    """`ic.alg_minhash_256` with the 64 permutations evaluated over all features at once"""
+    values = np.array(features, dtype=np.uint64)
+    with np.errstate(over="ignore"):  # Products wrap at 64 bits like `& MAXI64` in iscc-core
+        mhash = [int((((a * values + b) % MPRIME) & MAXH).min()) for a, b in PERMUTATIONS]
+    return ic.alg_minhash_compress(mhash, 4)
+
+
+def chunk_file(filepath, avg_chunk_size=ic.core_opts.data_avg_chunk_size, limit=None):
+    # type: (str, int, int|None) -> dict
+    """
+    Chunk a memory-mapped file and return chunk offsets, sizes, xxh32 features and Data-Code.
+
+    :param limit: Chunk only the first `limit` bytes (the result has the Data-Code of that part)
+    """
+    start_time = time.perf_counter()
+    size = os.path.getsize(filepath)
+    length = size if limit is None else min(size, limit)
+    # A plain ndarray view of the mapping, as slicing `np.memmap` objects is slow
+    data = np.memmap(filepath, dtype=np.uint8, mode="r", shape=length).view(np.ndarray) if length else EMPTY
+    ends = cdc_offsets(data, avg_chunk_size) or [0]  # Like `ic.alg_cdc_chunks` empty data is one empty chunk
+    starts = [0] + ends[:-1]
+    view = memoryview(data)
+    features = [xxhash.xxh32_intdigest(view[s:e]) for s, e in zip(starts, ends)]
+    digest = minhash_256(features)
+    data_code = ic.encode_component(ic.MT.DATA, ic.ST.NONE, ic.VS.V0, ic.core_opts.data_bits, digest)
+    return dict(
+        offsets=starts,
+        sizes=[e - s for s, e in zip(starts, ends)],
+        features=features,
+        data_code=f"ISCC:{data_code}",
+        size=size,
+        chunked=length,
+        seconds=time.perf_counter() - start_time,
+    )
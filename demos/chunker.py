@@ -1,12 +1,21 @@
 import gradio as gr
 import iscc_core as ic
-import iscc_sdk as idk
 import pathlib
+from bisect import bisect_left
+from collections import defaultdict, deque
+from functools import lru_cache
+from demos.cdc import chunk_file
+from demos.granular import BANDS, ChunkIndex, text_chunk_features
+from demos.options import opts
+from demos.profiling import SAMPLER
+from demos.scheduling import HEAVY, LIGHT
 
 
 HERE = pathlib.Path(__file__).parent.absolute()
-SAMPLE_FILEPATH = HERE / "samples/sample.txt"
+SAMPLES = HERE / "samples"
+SAMPLE_FILEPATH = SAMPLES / "sample.txt"
 sample_text = open(SAMPLE_FILEPATH, "rt", encoding="utf-8").read()
+MAX_CHUNK_ROWS = 1000
 
 newline_symbols = {
     "\u000a": "⏎",  # Line Feed - Represented by the 'Return' symbol
@@ -18,6 +27,12 @@ newline_symbols = {
     "\u2029": "¶",  # Paragraph Separator - Represented by the 'Pilcrow' symbol
 }
 
+diff_colors = {
+    "shared": "#a6db50",
+    "moved": "#7ac2f7",
+    "changed": "#f56169",
+}
+
 custom_css = """
 #chunked-text span.label {
     text-transform: none !important;
@@ -32,24 +47,138 @@ def no_nl(text):
     return text
 
 
+@SAMPLER.profile
 def chunk_text(text, chunk_size):
-    original_chunk_size = idk.sdk_opts.text_avg_chunk_size
-    idk.sdk_opts.text_avg_chunk_size = chunk_size
-    cleaned = ic.text_clean(text)
-    processed = idk.text_features(cleaned)
-    features = processed["features"]
-    sizes = processed["sizes"]
-    start = 0
-    chunks = []
-    for size in sizes:
-        end = start + size
-        chunks.append(no_nl(cleaned[start:end]))
-        start = end
-    result = [(chunk, f"{size}:{feat}") for chunk, size, feat in zip(chunks, sizes, features)]
-    idk.sdk_opts.text_avg_chunk_size = original_chunk_size
+    chunks, features = text_chunk_features(text, chunk_size)
+    return [(no_nl(chunk), f"{len(chunk)}:{feat}") for chunk, feat in zip(chunks, features)]
+
+
+def longest_increasing_subsequence(values):
+    # type: (list[int]) -> set[int]
+    """Return indices of a longest strictly increasing subsequence in O(n log n)"""
+    tails = []  # Smallest tail value of increasing subsequences by length
+    tail_idx = []  # Index of that tail value in `values`
+    prev = [-1] * len(values)
+    for i, value in enumerate(values):
+        pos = bisect_left(tails, value)
+        if pos == len(tails):
+            tails.append(value)
+            tail_idx.append(i)
+        else:
+            tails[pos] = value
+            tail_idx[pos] = i
+        prev[i] = tail_idx[pos - 1] if pos else -1
+    result = set()
+    i = tail_idx[-1] if tail_idx else -1
+    while i != -1:
+        result.add(i)
+        i = prev[i]
     return result
 
 
+def chunk_diff(features_a, features_b):
+    # type: (list[str], list[str]) -> tuple[list[str], list[str]]
+    """
+    Match chunks of two texts by feature hash and label them as shared, moved or changed.
+
+    Uses a hash index over the features of A instead of pairwise diffing. Matches that keep
+    their relative order (longest increasing subsequence of positions in A) are `shared`,
+    other matches are `moved` and unmatched chunks are `changed`.
+    """
+    index = defaultdict(deque)
+    for pos, feat in enumerate(features_a):
+        index[feat].append(pos)
+
+    matches = []  # (position in B, position in A)
+    for pos_b, feat in enumerate(features_b):
+        positions = index.get(feat)
+        if positions:
+            matches.append((pos_b, positions.popleft()))
+
+    in_order = longest_increasing_subsequence([pos_a for _, pos_a in matches])
+    labels_a = ["changed"] * len(features_a)
+    labels_b = ["changed"] * len(features_b)
+    for i, (pos_b, pos_a) in enumerate(matches):
+        label = "shared" if i in in_order else "moved"
+        labels_a[pos_a] = label
+        labels_b[pos_b] = label
+    return labels_a, labels_b
+
+
+@SAMPLER.profile
+def diff_text(text_a, text_b, chunk_size):
+    """Chunk two texts and highlight shared, moved and changed chunks"""
+    if not text_a or not text_b:
+        return None, None, ""
+    chunks_a, features_a = text_chunk_features(text_a, chunk_size)
+    chunks_b, features_b = text_chunk_features(text_b, chunk_size)
+    labels_a, labels_b = chunk_diff(features_a, features_b)
+
+    size_a = sum(len(chunk) for chunk in chunks_a)
+    size_b = sum(len(chunk) for chunk in chunks_b)
+    matched_a = sum(len(chunk) for chunk, label in zip(chunks_a, labels_a) if label != "changed")
+    matched_b = sum(len(chunk) for chunk, label in zip(chunks_b, labels_b) if label != "changed")
+    # Texts that are empty after cleaning (whitespace only) are identical to each other only
+    empty = float(size_a + size_b == 0)
+    similarity = (matched_a + matched_b) / (size_a + size_b) if size_a + size_b else empty
+    score = (
+        f"**Similarity:** {similarity:.2%} | "
+        f"**A contained in B:** {matched_a / size_a if size_a else empty:.2%} | "
+        f"**B contained in A:** {matched_b / size_b if size_b else empty:.2%}"
+    )
+    highlighted_a = [(no_nl(chunk), label) for chunk, label in zip(chunks_a, labels_a)]
+    highlighted_b = [(no_nl(chunk), label) for chunk, label in zip(chunks_b, labels_b)]
+    return highlighted_a, highlighted_b, score
+
+
+@SAMPLER.profile
+def chunk_binary(file, chunk_size):
+    """Chunk the raw bytes of a file like the Data-Code and list the first chunks"""
+    if file is None:
+        return None, ""
+    result = chunk_file(file.name, int(chunk_size), limit=opts.chunker_max_mb * 1024 * 1024)
+    sizes = result["sizes"]
+    rows = [
+        [offset, size, f"{feature:08x}"]
+        for offset, size, feature in zip(result["offsets"], sizes, result["features"])
+    ][:MAX_CHUNK_ROWS]
+    summary = (
+        f"**Chunks:** {len(sizes):,} | "
+        f"**Size avg/min/max:** {sum(sizes) / len(sizes):,.0f} / {min(sizes):,} / {max(sizes):,} bytes | "
+        f"**Data-Code:** `{result['data_code']}` | "
+        f"**Time:** {result['seconds']:.2f}s"
+    )
+    if result["chunked"] < result["size"]:
+        summary += (
+            f"  \n*Chunked the first {result['chunked']:,} of {result['size']:,} bytes"
+            f" (limit {opts.chunker_max_mb} MB), the Data-Code covers only that part*"
+        )
+    if len(sizes) > MAX_CHUNK_ROWS:
+        summary += f"  \n*Showing the first {MAX_CHUNK_ROWS:,} chunks*"
+    return rows, summary
+
+
+@lru_cache(maxsize=1)
+def passage_index():
+    # type: () -> ChunkIndex
+    """Load configured chunk-feature index or build one over the bundled samples"""
+    if opts.text_index_path:
+        return ChunkIndex.load(opts.text_index_path)
+    return ChunkIndex.from_directory(SAMPLES, chunk_size=opts.text_index_chunk_size)
+
+
+@SAMPLER.profile
+def search_passage(text, max_distance):
+    """Find indexed documents that contain near-identical passages"""
+    if not text:
+        return None
+    hits = passage_index().search(text, max_distance=int(max_distance))
+    return [
+        [hit["name"], f"{hit['coverage']:.2%}", hit["chunks"], ", ".join(map(str, hit["offsets"]))]
+        for hit in hits
+    ]
+
+
 with gr.Blocks(css=custom_css) as demo:
     with gr.Row(variant="panel"):
         gr.Markdown(
@@ -81,8 +210,85 @@ with gr.Blocks(css=custom_css) as demo:
             interactive=False,
             elem_id="chunked-text",
         )
+    with gr.Row(variant="panel"):
+        with gr.Column(variant="panel"):
+            in_text_b = gr.TextArea(
+                label="Chunk Diff",
+                info="COMPARE AGAINST THE TEXT ABOVE",
+                placeholder="Paste a revised version of the text here",
+                lines=12,
+                max_lines=12,
+            )
+            out_diff_score = gr.Markdown()
+        with gr.Column():
+            out_diff_a = gr.HighlightedText(
+                label="Text A",
+                interactive=False,
+                color_map=diff_colors,
+                show_legend=True,
+            )
+            out_diff_b = gr.HighlightedText(
+                label="Text B",
+                interactive=False,
+                color_map=diff_colors,
+                show_legend=True,
+            )
+    with gr.Row(variant="panel"):
+        with gr.Column(variant="panel"):
+            in_binary = gr.File(label=f"Binary Chunker (first {opts.chunker_max_mb} MB of a file)")
+            in_binary_chunksize = gr.Slider(
+                label="Chunk Size",
+                info="AVERAGE NUMBER OF BYTES PER CHUNK",
+                minimum=256,
+                maximum=8192,
+                step=256,
+                value=ic.core_opts.data_avg_chunk_size,
+            )
+            out_binary_summary = gr.Markdown()
+        out_binary_chunks = gr.Dataframe(
+            headers=["Offset", "Size", "Feature (xxh32)"],
+            label="Data Chunks",
+            interactive=False,
+        )
+    with gr.Row(variant="panel"):
+        with gr.Column(variant="panel"):
+            in_passage = gr.TextArea(
+                label="Passage Search",
+                info="FIND INDEXED DOCUMENTS CONTAINING NEAR-IDENTICAL PASSAGES",
+                placeholder="Paste a passage here",
+                lines=6,
+                max_lines=6,
+            )
+            in_distance = gr.Slider(
+                label="Max Hamming Distance",
+                info="TOLERATED BIT DIFFERENCES PER CHUNK FEATURE",
+                minimum=0,
+                maximum=BANDS - 1,
+                step=1,
+                value=BANDS - 1,
+            )
+        out_passage_hits = gr.Dataframe(
+            headers=["Document", "Coverage", "Chunks", "Offsets"],
+            label="Matching Documents",
+            interactive=False,
+        )
     with gr.Row():
-        gr.ClearButton(components=[in_text, in_chunksize, out_text])
+        gr.ClearButton(
+            components=[
+                in_text,
+                in_chunksize,
+                out_text,
+                in_text_b,
+                out_diff_a,
+                out_diff_b,
+                out_diff_score,
+                in_binary,
+                out_binary_chunks,
+                out_binary_summary,
+                in_passage,
+                out_passage_hits,
+            ]
+        )
     with gr.Row(variant="panel"):
         gr.Markdown(
             """
@@ -105,7 +311,17 @@ with gr.Blocks(css=custom_css) as demo:
         Observe how the chunks get smaller/larger on average. Smaller sizes result in more,
         more fine grained chunks, while larger sizes produce fewer, larger chunks on average.
 
-        D) Use the **Clear Button** to start over.
+        D) **Paste a revised version** into the "Chunk Diff" field.
+
+        Chunks of both texts are matched by their similarity hash. Shared chunks are shown in
+        green, chunks that moved to a different position in blue and changed chunks in red.
+
+        E) **Upload any file** to the "Binary Chunker".
+
+        The raw bytes are chunked exactly like for the Data-Code. The table lists the offset, size
+        and `xxhash` feature of each chunk and the summary shows the resulting Data-Code.
+
+        F) Use the **Clear Button** to start over.
 
         For more information about ISCC chunking, please visit: https://core.iscc.codes/algorithms/cdc/
         """,
@@ -134,8 +350,41 @@ with gr.Blocks(css=custom_css) as demo:
         """
         )
 
-    in_text.change(chunk_text, inputs=[in_text, in_chunksize], outputs=[out_text])
-    in_chunksize.change(chunk_text, inputs=[in_text, in_chunksize], outputs=[out_text])
+    in_text.change(
+        LIGHT.limit(chunk_text),
+        inputs=[in_text, in_chunksize],
+        outputs=[out_text],
+        concurrency_limit=None,
+    )
+    in_chunksize.change(
+        LIGHT.limit(chunk_text),
+        inputs=[in_text, in_chunksize],
+        outputs=[out_text],
+        concurrency_limit=None,
+    )
+    for trigger in (in_text.change, in_text_b.change, in_chunksize.change):
+        trigger(
+            LIGHT.limit(diff_text),
+            inputs=[in_text, in_text_b, in_chunksize],
+            outputs=[out_diff_a, out_diff_b, out_diff_score],
+            concurrency_limit=None,
+        )
+
+    for trigger in (in_binary.upload, in_binary_chunksize.release):
+        trigger(
+            HEAVY.limit(chunk_binary),
+            inputs=[in_binary, in_binary_chunksize],
+            outputs=[out_binary_chunks, out_binary_summary],
+            concurrency_limit=None,
+        )
+
+    for trigger in (in_passage.change, in_distance.change):
+        trigger(
+            LIGHT.limit(search_passage),
+            inputs=[in_passage, in_distance],
+            outputs=[out_passage_hits],
+            concurrency_limit=None,
+        )
 
 
 if __name__ == "__main__":
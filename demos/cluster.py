@@ -0,0 +1,235 @@
+"""Near-duplicate clustering of a media directory by extended ISCC.
+
+Files are processed in parallel batches with `iscc_semantic_batch` (ISCC-CODE plus
+Semantic-Code). Two items are near-duplicates if they share the Instance-Code or if any compatible unit
+(same MainType and SubType, as in `ic.iscc_compare`) is within its Hamming threshold. Candidate
+pairs come from a banded index instead of all-pairs comparison: each 64-bit unit body is split
+into `bands` bands and items sharing a band value are compared. Any pair within `bands - 1` bits
+is guaranteed to share a band; larger thresholds are matched probabilistically. Within very
+large buckets only the `window` nearest neighbours in sort order are paired to bound the work
+per bucket. Pairs skipped that way are counted and logged as a warning (raise `--window` or
+`--bands` to recover them).
+
+Usage: python -m demos.cluster <directory> [clusters.json] [--content 3] [--semantic 3] [--data 3]
+"""
+
+import argparse
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+import numpy as np
+import iscc_core as ic
+from loguru import logger as log
+from demos.executor import bounded_submit
+from demos.granular import hamming
+from demos.options import opts
+from demos.serialize import dumps
+
+
+__all__ = [
+    "UnionFind",
+    "UnitTable",
+    "near_pairs",
+    "cluster_isccs",
+    "cluster_directory",
+]
+
+UNITS = {ic.MT.SEMANTIC: "semantic", ic.MT.CONTENT: "content", ic.MT.DATA: "data", ic.MT.INSTANCE: "instance"}
+
+
+class UnionFind:
+    """Disjoint sets over integer ids with path halving and union by size"""
+
+    def __init__(self, size):
+        # type: (int) -> None
+        self.parent = np.arange(size, dtype=np.int64)
+        self.size = np.ones(size, dtype=np.int64)
+
+    def find(self, x):
+        # type: (int) -> int
+        parent = self.parent
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return int(x)
+
+    def union(self, a, b):
+        # type: (int, int) -> None
+        ra, rb = self.find(a), self.find(b)
+        if ra == rb:
+            return
+        if self.size[ra] < self.size[rb]:
+            ra, rb = rb, ra
+        self.parent[rb] = ra
+        self.size[ra] += self.size[rb]
+
+    def groups(self):
+        # type: () -> list[list[int]]
+        """Return all sets with more than one member"""
+        roots = self.parent.copy()
+        while True:
+            parents = roots[roots]
+            if np.array_equal(parents, roots):
+                break
+            roots = parents
+        order = np.argsort(roots, kind="stable")
+        bounds = np.flatnonzero(np.diff(roots[order])) + 1
+        return [group.tolist() for group in np.split(order, bounds) if len(group) > 1]
+
+
+class UnitTable:
+    """Per-unit 64-bit bodies and SubTypes of many ISCCs as column arrays (SubType -1 if missing)"""
+
+    def __init__(self, isccs):
+        # type: (list[str]) -> None
+        self.values = {name: np.zeros(len(isccs), dtype=np.uint64) for name in UNITS.values()}
+        self.subtypes = {name: np.full(len(isccs), -1, dtype=np.int16) for name in UNITS.values()}
+        for row, iscc in enumerate(isccs):
+            for unit in ic.iscc_decompose(iscc):
+                code = ic.Code(unit)
+                name = UNITS.get(code.maintype)
+                if name is not None:
+                    self.values[name][row] = int.from_bytes(code.hash_bytes[:8], "big")
+                    self.subtypes[name][row] = code.subtype
+
+
+def skipped_pairs(keys, window):
+    # type: (np.ndarray, int) -> int
+    """Number of same-key pairs in sorted `keys` that are more than `window` positions apart"""
+    sizes = np.unique(keys, return_counts=True)[1].astype(np.int64)
+    sizes = sizes[sizes > window + 1]
+    # A bucket of n rows has n(n-1)/2 pairs, the window covers w(n-w) + w(w-1)/2 of them
+    return int(np.sum(sizes * (sizes - 1) // 2 - window * (sizes - window) - window * (window - 1) // 2))
+
+
+def near_pairs(values, subtypes, limit, bands=4, window=64):
+    # type: (np.ndarray, np.ndarray, int, int, int) -> np.ndarray
+    """Return unique row pairs (shape (N, 2)) with same SubType and at most `limit` bits distance"""
+    rows = np.flatnonzero(subtypes >= 0)
+    band_bits = 64 // bands
+    mask = np.uint64((1 << band_bits) - 1)
+    candidates, skipped, pairs = 0, 0, []
+    for band in range(bands):
+        band_values = (values[rows] >> np.uint64(band * band_bits)) & mask
+        keys = (subtypes[rows].astype(np.uint64) << np.uint64(band_bits)) | band_values
+        order = np.argsort(keys, kind="stable")
+        keys, ordered = keys[order], rows[order]
+        skipped += skipped_pairs(keys, window)
+        # Pair each row with its successors in sort order while the key stays the same and keep
+        # only verified matches so memory is bounded by the number of near-duplicates
+        for shift in range(1, window + 1):
+            same = np.flatnonzero(keys[shift:] == keys[:-shift])
+            if not len(same):
+                break
+            a, b = ordered[same], ordered[same + shift]
+            close = hamming(values[a], values[b]) <= limit
+            candidates += len(same)
+            pairs.append(np.stack([a[close], b[close]], axis=1))
+    log.debug(f"{candidates} candidate pairs")
+    if skipped:
+        log.warning(f"Skipped {skipped} candidate pairs in band buckets larger than window {window}")
+    if not pairs:
+        return np.empty((0, 2), dtype=np.int64)
+    return np.unique(np.sort(np.concatenate(pairs), axis=1), axis=0)
+
+
+def cluster_isccs(isccs, thresholds, bands=4, window=64):
+    # type: (list[str], dict[str, int], int, int) -> list[list[int]]
+    """
+    Group ISCCs into near-duplicate clusters.
+
+    :param isccs: Extended ISCC-CODEs
+    :param thresholds: Max Hamming distance per unit (`semantic`, `content`, `data`)
+    :param bands: Number of bands per 64-bit unit body for candidate generation
+    :param window: Max number of successors paired per item within one band bucket
+    :return: Clusters as lists of indexes into `isccs` (largest first)
+    """
+    table = UnitTable(isccs)
+    uf = UnionFind(len(isccs))
+    units = [(name, limit) for name, limit in thresholds.items() if limit is not None and limit >= 0]
+    units.append(("instance", 0))
+    for name, limit in units:
+        matches = near_pairs(table.values[name], table.subtypes[name], limit, bands=bands, window=window)
+        log.info(f"{name}: {len(matches)} pairs within {limit} bits")
+        for a, b in matches.tolist():
+            uf.union(a, b)
+    return sorted(uf.groups(), key=len, reverse=True)
+
+
+def generate_batch(filepaths):
+    # type: (list[str]) -> list[tuple[str, str|None, str|None]]
+    """Generate extended ISCCs for a batch of files in a worker process (one inference call per batch)"""
+    from demos.extended import iscc_semantic_batch
+
+    try:
+        results = iscc_semantic_batch(filepaths)
+    except Exception as e:
+        return [(filepath, None, str(e)) for filepath in filepaths]
+    return [
+        (filepath, None, str(result)) if isinstance(result, Exception) else (filepath, result.iscc, None)
+        for filepath, result in zip(filepaths, results)
+    ]
+
+
+def batches(files, size):
+    # type: (list[str], int) -> deque[list[str]]
+    """Split `files` into a queue of batches of up to `size` files"""
+    return deque(files[i : i + size] for i in range(0, len(files), size))
+
+
+def cluster_directory(path, thresholds, bands=4, window=64, workers=None):
+    # type: (str|Path, dict[str, int], int, int, int|None) -> dict
+    """Generate ISCCs for all files below `path` in parallel and cluster them"""
+    files = sorted(fp.as_posix() for fp in Path(path).rglob("*") if fp.is_file())
+    workers = workers or opts.executor_workers
+    log.info(f"Processing {len(files)} files with {workers} workers")
+    results, failed = {}, {}
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        queue = batches(files, opts.semantic_batch_size)
+        for batch, future in bounded_submit(partial(pool.submit, generate_batch), queue, workers * 2):
+            for filepath, iscc, error in future.result():
+                if iscc is None:
+                    failed[filepath] = error
+                else:
+                    results[filepath] = iscc
+            done = len(results) + len(failed)
+            if done // 1000 > (done - len(batch)) // 1000:
+                log.info(f"{done}/{len(files)} files ({done / (time.perf_counter() - start):.1f} files/s)")
+    names = sorted(results)  # Completion order varies between runs
+    isccs = [results[name] for name in names]
+    clusters = cluster_isccs(isccs, thresholds, bands=bands, window=window)
+    return dict(
+        files=len(files),
+        failed=failed,
+        thresholds=thresholds,
+        clusters=[[dict(file=names[i], iscc=isccs[i]) for i in cluster] for cluster in clusters],
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cluster near-duplicate media files by extended ISCC")
+    parser.add_argument("path", help="Directory to scan recursively")
+    parser.add_argument("output", nargs="?", help="JSON report (default: stdout)")
+    parser.add_argument("--content", type=int, default=3, help="Content-Code threshold (-1 disables)")
+    parser.add_argument("--semantic", type=int, default=3, help="Semantic-Code threshold (-1 disables)")
+    parser.add_argument("--data", type=int, default=3, help="Data-Code threshold (-1 disables)")
+    parser.add_argument("--bands", type=int, default=4, help="Bands per unit for candidate generation")
+    parser.add_argument("--window", type=int, default=64, help="Max pairs per item and band bucket")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Worker processes")
+    args = parser.parse_args()
+    thresholds = dict(content=args.content, semantic=args.semantic, data=args.data)
+    report = cluster_directory(args.path, thresholds, args.bands, args.window, args.workers)
+    data = dumps(report, pretty=True)
+    if args.output:
+        Path(args.output).write_bytes(data)
+    else:
+        sys.stdout.buffer.write(data)
+
+
+if __name__ == "__main__":
+    main()
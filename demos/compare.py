@@ -1,15 +1,29 @@
+import asyncio
 import base64
 import io
+import os
 from loguru import logger as log
 from pathlib import Path
 import gradio as gr
-from PIL import Image
+from PIL import Image, ImageEnhance
 import iscc_core as ic
 import iscc_sdk as idk
 import iscc_schema as iss
 import iscc_sci as sci
 import plotly.graph_objects as go
 import pandas as pd
+from demos.cache import content_digest
+from demos.exact import EXACT_SEMANTIC, compute_guarded, instance_code
+from demos.executor import run_blocking
+from demos.extended import compose_iscc, content_record, iscc_semantic
+from demos.memory import DecodeBudgetExceeded, guard_decode
+from demos.profiling import SAMPLER
+from demos.samples import SampleArtifact
+from demos.scheduling import HEAVY, LIGHT
+from demos.serialize import MetaPayload, split_thumbnail
+from demos.semantic import code_image_semantic
+from demos.units import BITS, compare_units, expand_units, long_units_guarded, split_units
+from demos.uploads import UPLOADS
 
 
 idk.sdk_opts.image_thumbnail_size = 265
@@ -19,6 +33,8 @@ idk.sdk_opts.image_thumbnail_quality = 80
 HERE = Path(__file__).parent.absolute()
 IMAGES1 = HERE / "images1"
 IMAGES2 = HERE / "images2"
+SAMPLES = SampleArtifact()
+SCHEMA_TYPES = {"text": "TextDigitalDocument", "image": "ImageObject", "audio": "AudioObject"}
 
 
 custom_css = """
@@ -121,26 +137,63 @@ custom_css = """
 """
 
 
-def iscc_semantic(filepath: str) -> idk.IsccMeta:
-    """Generate ISCC-CODE extended with Semantic-Code for supported modalities (Image)"""
-    imeta = idk.code_iscc(filepath)
-    if imeta.mode == "image":
-        # Inject Semantic-Code
-        sci_code = sci.code_image_semantic(filepath, bits=64)["iscc"]
-        units = ic.iscc_decompose(imeta.iscc)
-        units.append(sci_code)
-        iscc_code_s = ic.gen_iscc_code(units)["iscc"]
-        imeta.iscc = iscc_code_s
-    return imeta
+def data_unit(filepath, bits=64):
+    # type: (str, int) -> str
+    """Data-Code (plain hashing without decoding)"""
+    with open(filepath, "rb") as stream:
+        return ic.gen_data_code_v0(stream, bits=bits)["iscc"]
+
+
+def content_fields(filepath, bits=64):
+    # type: (str, int) -> dict
+    """
+    Content-Code with `bits` length plus content fields and thumbnail (not for videos).
+
+    Images are decoded once for both the Image-Code and the thumbnail (`idk.code_image` opens
+    the file twice) and texts are extracted once, also for Text-Codes longer than 64 bits.
+    """
+    mediatype, mode = idk.mediatype_and_mode(filepath)
+    with guard_decode(filepath) as processed:
+        if mode == "image":
+            with Image.open(processed) as image:
+                image.load()
+                fields = ic.gen_image_code_v0(idk.image_normalize(image), bits=bits)
+                size = idk.sdk_opts.image_thumbnail_size
+                image.thumbnail((size, size), resample=idk.LANCZOS)
+                thumbnail = ImageEnhance.Sharpness(image.convert("RGB")).enhance(1.4)
+            fields["thumbnail"] = idk.image_to_data_url(thumbnail)
+        elif mode == "text":
+            text = idk.text_extract(processed)
+            fields = ic.gen_text_code_v0(text, bits=bits)
+            thumbnail = idk.text_thumbnail(processed)
+            if thumbnail:
+                fields["thumbnail"] = idk.image_to_data_url(thumbnail)
+        else:
+            fields = idk.code_content(processed, extract_meta=False, create_thumb=True).dict()
+    fields.update(mediatype=mediatype, mode=mode, type_=SCHEMA_TYPES.get(mode))
+    return fields
+
+
+def semantic_meta(filepath, bits=64):
+    # type: (str, int) -> tuple[str|None, idk.IsccMeta]
+    """Semantic-Code with `bits` length (images only) and Meta-Code of the upload"""
+    mediatype, mode = idk.mediatype_and_mode(filepath)
+    semantic = None
+    if mode == "image":
+        with guard_decode(filepath) as processed:
+            semantic = code_image_semantic(processed, bits=bits)["iscc"]
+    return semantic, idk.code_meta(filepath)
 
 
 def dist_to_sim(data, dim=64):
+    # type: (dict, int|dict) -> dict
+    """Convert unit distances to similarities (`dim` is the bit length of all or of each unit)"""
     result = {}
     for k, v in data.items():
         if k == "instance_match":
             result[k.split("_")[0].title()] = 1.0 if v is True else -1.0
         else:
-            result[k.split("_")[0].title()] = hamming_to_similarity(v, dim)
+            result[k.split("_")[0].title()] = hamming_to_similarity(v, dim[k] if isinstance(dim, dict) else dim)
     return result
 
 
@@ -260,22 +313,30 @@ def similarity_plot(sim_data):
     return fig
 
 
+def unit_bits(iscc):
+    # type: (str) -> dict[str, str]
+    """Map unit type to hash bits for an ISCC-CODE or space separated ISCC-UNITs"""
+    data = {}
+    for unit in split_units(iscc):
+        unit = ic.Code(unit)
+        data[unit.type_id.split("-")[0]] = unit.hash_bits
+    return data
+
+
 def bit_matrix_plot(iscc_code):
-    # type: (ic.Code) -> go.Figure
+    # type: (str) -> go.Figure
     """
-    Create a bit matrix plot for an ISCC-CODE
+    Create a bit matrix plot for an ISCC-CODE or space separated ISCC-UNITs
     """
 
     # Decode ISCC-CODE
-    data = {}
-    for unit in ic.iscc_decompose(iscc_code.code):
-        unit = ic.Code(unit)
-        data[unit.type_id.split("-")[0]] = unit.hash_bits
+    data = unit_bits(iscc_code)
 
-    # Prepare data for heatmap
+    # Prepare data for heatmap (shorter units are padded with gaps)
+    width = max(len(value) for value in data.values())
     z = []
     for key, value in data.items():
-        z.append([int(bit) for bit in value])
+        z.append([int(bit) for bit in value] + [None] * (width - len(value)))
 
     # Define colors for 0 and 1 bits
     colorscale = [[0, "#7ac2f7"], [1, "#0054b2"]]
@@ -352,15 +413,10 @@ def bit_comparison(iscc_code1, iscc_code2):
     """
 
     # Decode ISCC-CODEs
-    data1, data2 = {}, {}
-    for unit in ic.iscc_decompose(iscc_code1):
-        unit = ic.Code(unit)
-        data1[unit.type_id.split("-")[0]] = unit.hash_bits
-    for unit in ic.iscc_decompose(iscc_code2):
-        unit = ic.Code(unit)
-        data2[unit.type_id.split("-")[0]] = unit.hash_bits
+    data1, data2 = unit_bits(iscc_code1), unit_bits(iscc_code2)
 
-    # Prepare data for heatmap comparison
+    # Prepare data for heatmap comparison (over the bits both units have, padded with gaps)
+    width = max(len(value) for value in data1.values())
     z = []
     text = []
     for key in data1.keys():
@@ -373,8 +429,8 @@ def bit_comparison(iscc_code1, iscc_code2):
             else:
                 z_row.append(2)
                 text_row.append("x")
-        z.append(z_row)
-        text.append(text_row)
+        z.append(z_row + [None] * (width - len(z_row)))
+        text.append(text_row + [""] * (width - len(text_row)))
 
     # Define colors for 0, 1, and non-matching bits
     colorscale = [[0, "#a6db50"], [0.5, "#a6db50"], [1, "#f56169"]]
@@ -523,6 +579,14 @@ with gr.Blocks(css=custom_css) as demo:
                 )
                 out_meta_b = gr.Code(language="json", label="ISCC Metadata")
 
+    with gr.Row(variant="default"):
+        in_bits = gr.Radio(
+            choices=list(BITS),
+            value=64,
+            label="Code Length",
+            info="BITS PER ISCC-UNIT FOR NEW UPLOADS (LONGER UNITS ARE SHOWN AS SEPARATE ISCC-UNITS)",
+        )
+
     with gr.Row(variant="default", equal_height=True):
         with gr.Column(variant="compact"):
             out_bitcompare = gr.Plot(
@@ -561,9 +625,19 @@ with gr.Blocks(css=custom_css) as demo:
             log.info(filepath)
             return outpath.as_posix()
 
-    def process_upload(filepath, suffix):
-        # type: (str, str) -> dict
-        """Generate extended ISCC with experimental Semantic Code (for images)"""
+    @SAMPLER.profile
+    async def process_upload(filepath, suffix, bits=64):
+        """
+        Generate extended ISCC with experimental Semantic Code (for images) in phases.
+
+        Data- and Instance-Code are yielded first, then the Content-Code and finally the full
+        extended ISCC with metadata. Every update of the ISCC re-renders the comparison, so the
+        cheapest units show up first. The phases run concurrently and each computes only its own
+        units: the upload is hashed once for the sample lookup, the upload store and the
+        Instance-Code, and the last phase adds just the Semantic- and Meta-Code before composing
+        the ISCC-CODE. Content records of earlier uploads (also from other replicas through the
+        shared cache) skip the phases.
+        """
 
         # Map to active component group
         in_file_func = globals().get(f"in_file_{suffix}")
@@ -574,56 +648,126 @@ with gr.Blocks(css=custom_css) as demo:
 
         # Handle emtpy filepath
         if not filepath:
-            return {
+            yield {
                 in_file_func: None,
             }
-
-        imeta: idk.IsccMeta = iscc_semantic(filepath)
+            return
+
+        # Bundled samples (also when uploaded again) are served from the precomputed artifact
+        digest = await run_blocking(content_digest, filepath)
+        sample = SAMPLES.get(digest)
+        if sample is not None:
+            # Content units of the sample with the Meta-Code and filename of this upload
+            imeta = await run_blocking(compose_iscc, filepath, sample["units"], sample["fields"])
+            iscc = imeta.iscc
+            if bits != 64:
+                iscc = await run_blocking(long_units_guarded, filepath, iscc, bits)
+            yield {
+                in_file_func: gr.File(visible=False, value=None),
+                out_thumb_func: gr.Image(visible=True, value=sample["thumbnail"]),
+                out_iscc_func: iscc,
+                out_dna_func: bit_matrix_plot(iscc),
+                out_meta_func: MetaPayload(split_thumbnail(imeta)[1]).text,
+            }
+            return
+
+        stored = await run_blocking(UPLOADS.acquire, filepath, digest)
+        tasks = []
+        try:
+            # Exact duplicates of earlier uploads skip the phases
+            instance = instance_code(digest)
+            record = await run_blocking(EXACT_SEMANTIC.get, instance)
+            if record is not None:
+                imeta = await run_blocking(compose_iscc, stored, record["units"], record["fields"])
+                iscc = await run_blocking(long_units_guarded, stored, imeta.iscc, bits)
+            else:
+                mediatype, mode = await run_blocking(idk.mediatype_and_mode, stored)
+                data_task = asyncio.ensure_future(run_blocking(data_unit, stored, bits))
+                if mode == "video":
+                    # Videos get Content- and Semantic-Code from one decoding pass in `code_iscc_video`
+                    phases = [
+                        asyncio.ensure_future(run_blocking(compute_guarded, iscc_semantic, stored, digest))
+                    ]
+                else:
+                    phases = [
+                        asyncio.ensure_future(run_blocking(content_fields, stored, bits)),
+                        asyncio.ensure_future(run_blocking(semantic_meta, stored, bits)),
+                    ]
+                tasks = [data_task] + phases
+                units = [await data_task, instance_code(digest, bits)]
+                yield {out_iscc_func: " ".join(units), out_dna_func: bit_matrix_plot(" ".join(units))}
+                if mode == "video":
+                    imeta = await phases[0]
+                else:
+                    content = await phases[0]
+                    units.insert(0, content["iscc"])
+                    yield {out_iscc_func: " ".join(units), out_dna_func: bit_matrix_plot(" ".join(units))}
+                    semantic, meta = await phases[1]
+                    if semantic:
+                        units.insert(0, semantic)
+                    fields = dict(content, datahash=f"1e20{digest}", filesize=os.path.getsize(stored))
+                    imeta = await run_blocking(compose_iscc, stored, units, fields, meta)
+                await run_blocking(EXACT_SEMANTIC.put, instance, content_record(imeta))
+                iscc = imeta.iscc if bits == 64 else expand_units(imeta.iscc, units)
+        except DecodeBudgetExceeded as e:
+            raise gr.Error(str(e))
+        finally:
+            # Phases still running after a failure read the stored file until they finish
+            await asyncio.gather(*tasks, return_exceptions=True)
+            UPLOADS.release(stored)
 
         # Create Bit-Matrix Plot
-        matrix_plot = bit_matrix_plot(imeta.iscc_obj)
+        matrix_plot = bit_matrix_plot(iscc)
 
-        # Pop Thumbnail for Preview
+        # Split Thumbnail for Preview
+        data_url, metadata = split_thumbnail(imeta)
         thumbnail = None
-        if imeta.thumbnail:
-            header, encoded = imeta.thumbnail.split(",", 1)
+        if data_url:
+            header, encoded = data_url.split(",", 1)
             data = base64.b64decode(encoded)
             thumbnail = Image.open(io.BytesIO(data))
-            imeta.thumbnail = None
 
-        result = {
+        yield {
             in_file_func: gr.File(visible=False, value=None),
             out_thumb_func: gr.Image(visible=True, value=thumbnail),
-            out_iscc_func: imeta.iscc,
+            out_iscc_func: iscc,
             out_dna_func: matrix_plot,
-            out_meta_func: imeta.json(exclude_unset=False, by_alias=True, indent=2),
+            out_meta_func: MetaPayload(metadata).text,
         }
 
-        return result
+    async def process_upload_a(filepath, bits):
+        async for update in process_upload(filepath, "a", int(bits)):
+            yield update
+
+    async def process_upload_b(filepath, bits):
+        async for update in process_upload(filepath, "b", int(bits)):
+            yield update
 
     def iscc_compare(iscc_a, iscc_b):
         # type: (str, str) -> dict | None
-        """Compare two ISCCs"""
+        """Compare two ISCCs (or space separated ISCC-UNITs of any length)"""
         if not all([iscc_a, iscc_b]):
             return None, None
-        dist_data = ic.iscc_compare(iscc_a, iscc_b)
-        sim_data = dist_to_sim(dist_data, dim=64)
+        dist_data, dims = compare_units(iscc_a, iscc_b)
+        sim_data = dist_to_sim(dist_data, dim=dims)
         sim_plot = similarity_plot(sim_data)
         bit_plot = bit_comparison(iscc_a, iscc_b)
         return sim_plot, bit_plot
 
     # Events
     in_file_a.change(
-        lambda file: process_upload(file, "a"),
-        inputs=[in_file_a],
+        HEAVY.limit(process_upload_a),
+        inputs=[in_file_a, in_bits],
         outputs=[in_file_a, out_thumb_a, out_iscc_a, out_dna_a, out_meta_a],
         show_progress="full",
+        concurrency_limit=None,
     )
     in_file_b.change(
-        lambda file: process_upload(file, "b"),
-        inputs=[in_file_b],
+        HEAVY.limit(process_upload_b),
+        inputs=[in_file_b, in_bits],
         outputs=[in_file_b, out_thumb_b, out_iscc_b, out_dna_b, out_meta_b],
         show_progress="full",
+        concurrency_limit=None,
     )
     out_thumb_a.clear(
         lambda: (
@@ -652,17 +796,19 @@ with gr.Blocks(css=custom_css) as demo:
     )
 
     out_iscc_a.change(
-        iscc_compare,
+        LIGHT.limit(iscc_compare),
         inputs=[out_iscc_a, out_iscc_b],
         outputs=[out_compare, out_bitcompare],
         show_progress="hidden",
+        concurrency_limit=None,
     )
 
     out_iscc_b.change(
-        iscc_compare,
+        LIGHT.limit(iscc_compare),
         inputs=[out_iscc_a, out_iscc_b],
         outputs=[out_compare, out_bitcompare],
         show_progress="hidden",
+        concurrency_limit=None,
     )
 
     dumy_image_a.change(
@@ -680,4 +826,5 @@ with gr.Blocks(css=custom_css) as demo:
 
 
 if __name__ == "__main__":
+    SAMPLES.ensure(iscc_semantic)
     demo.launch(debug=True)
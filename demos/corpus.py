@@ -0,0 +1,141 @@
+"""One-vs-corpus similarity scan over extended ISCCs stored as unit columns.
+
+The corpus keeps the 64-bit body and SubType of every Semantic, Content, Data and Instance unit
+in numpy arrays (see `demos.cluster.UnitTable`). A scan scores each item like `dist_to_sim` over
+`ic.iscc_compare` (mean similarity of all compatible units) and walks the corpus in growing
+shards, yielding the running top-k after each shard so the first results are available long
+before the full scan completes.
+
+Build an index from a media directory with `python -m demos.corpus <dir> <corpus.npz>`.
+"""
+
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+import numpy as np
+from loguru import logger as log
+from demos.cluster import UNITS, UnitTable, batches, generate_batch
+from demos.executor import bounded_submit
+from demos.granular import hamming
+from demos.options import opts
+
+
+__all__ = [
+    "CorpusIndex",
+]
+
+
+class CorpusIndex:
+    """Extended ISCCs of a media corpus with a sharded top-k similarity scan"""
+
+    def __init__(self, names, isccs, table=None):
+        # type: (list[str], list[str], UnitTable|None) -> None
+        self.names = names
+        self.isccs = isccs
+        table = table or UnitTable(isccs)
+        self.values = table.values
+        self.subtypes = table.subtypes
+        self._instances = None  # type: tuple[np.ndarray, np.ndarray]|None - sorted Instance-Codes, rows
+
+    def __len__(self):
+        return len(self.names)
+
+    def score(self, query, start, stop):
+        # type: (UnitTable, int, int) -> np.ndarray
+        """Mean unit similarity in range [-1, +1] of rows `start:stop` (-inf without compatible units)"""
+        total = np.zeros(stop - start, dtype=np.float32)
+        count = np.zeros(stop - start, dtype=np.int8)
+        for name in UNITS.values():
+            subtype = query.subtypes[name][0]
+            if subtype < 0:
+                continue
+            compatible = self.subtypes[name][start:stop] == subtype
+            values = self.values[name][start:stop]
+            if name == "instance":
+                sim = np.where(values == query.values[name][0], 1.0, -1.0)
+            else:
+                sim = 1 - 2 * hamming(values, np.full(len(values), query.values[name][0])) / 64
+            total += np.where(compatible, sim, 0)
+            count += compatible
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(count > 0, total / count, -np.inf)
+
+    def exact(self, instance):
+        # type: (str) -> list[int]
+        """Rows with the same Instance-Code (binary search over sorted Instance-Codes, no scan)"""
+        if self._instances is None:
+            rows = np.flatnonzero(self.subtypes["instance"] >= 0)
+            order = np.argsort(self.values["instance"][rows], kind="stable")
+            self._instances = self.values["instance"][rows][order], rows[order]
+        values, rows = self._instances
+        key = UnitTable([instance]).values["instance"][0]
+        lo, hi = np.searchsorted(values, key, "left"), np.searchsorted(values, key, "right")
+        return rows[lo:hi].tolist()
+
+    def scan(self, iscc, k=20, first_shard=4096, max_shard=None):
+        """
+        Scan the corpus for the items most similar to `iscc`.
+
+        Shards start small for a fast first result and double up to `max_shard` rows.
+
+        :return: Generator of `(rows, scores, scanned)` with the top-k found so far (best first)
+        """
+        query = UnitTable([iscc])
+        max_shard = max_shard or opts.search_shard_size
+        best_rows = np.empty(0, dtype=np.int64)
+        best_scores = np.empty(0, dtype=np.float32)
+        start, shard = 0, first_shard
+        while start < len(self):
+            stop = min(start + shard, len(self))
+            rows = np.concatenate([best_rows, np.arange(start, stop)])
+            scores = np.concatenate([best_scores, self.score(query, start, stop)])
+            if len(rows) > k:
+                top = np.argpartition(-scores, k - 1)[:k]
+                rows, scores = rows[top], scores[top]
+            order = np.argsort(-scores, kind="stable")
+            best_rows, best_scores = rows[order], scores[order]
+            valid = np.isfinite(best_scores)
+            yield best_rows[valid], best_scores[valid], stop
+            start, shard = stop, min(shard * 2, max_shard)
+
+    def save(self, path):
+        # type: (str|Path) -> None
+        """Store names, ISCCs and decoded unit columns as numpy archive"""
+        columns = {f"values_{name}": values for name, values in self.values.items()}
+        columns.update({f"subtypes_{name}": subtypes for name, subtypes in self.subtypes.items()})
+        np.savez_compressed(path, names=np.array(self.names), isccs=np.array(self.isccs), **columns)
+
+    @classmethod
+    def load(cls, path):
+        # type: (str|Path) -> CorpusIndex
+        """Load corpus from numpy archive without decoding the ISCCs again"""
+        data = np.load(path)
+        table = UnitTable([])
+        table.values = {name: data[f"values_{name}"] for name in UNITS.values()}
+        table.subtypes = {name: data[f"subtypes_{name}"] for name in UNITS.values()}
+        return cls(data["names"].tolist(), data["isccs"].tolist(), table)
+
+    @classmethod
+    def from_directory(cls, path, workers=None):
+        # type: (str|Path, int|None) -> CorpusIndex
+        """Generate extended ISCCs for all files below `path` in a process pool"""
+        files = sorted(fp.as_posix() for fp in Path(path).rglob("*") if fp.is_file())
+        workers = workers or opts.executor_workers
+        results = {}
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            queue = batches(files, opts.semantic_batch_size)
+            for _, future in bounded_submit(partial(pool.submit, generate_batch), queue, workers * 2):
+                for filepath, iscc, error in future.result():
+                    if iscc is None:
+                        log.warning(f"Skipping {filepath}: {error}")
+                        continue
+                    results[filepath] = iscc
+        names = sorted(results)
+        isccs = [results[name] for name in names]
+        log.info(f"Indexed {len(names)} of {len(files)} files")
+        return cls(names, isccs)
+
+
+if __name__ == "__main__":
+    CorpusIndex.from_directory(sys.argv[1]).save(sys.argv[2])
@@ -0,0 +1,259 @@
+"""Exact-duplicate fast path keyed by Instance-Code.
+
+Content-derived results of expensive ISCC generation (all ISCC-UNITs but the Meta-Code and the
+fields that depend only on the file bytes) are stored per Instance-Code, a BLAKE3 hash of the
+file bytes. Name, filename, embedded metadata and Meta-Code are never stored; callers recompute
+them for every request and compose the ISCC-CODE again (see `demos.extended.compose_iscc`).
+
+Records live in an SQLite table on disk keyed by the 64-bit Instance-Code body. A Bloom filter in
+memory answers most lookups of unseen files without touching the disk. Like the upload store the
+table is bounded by a byte budget and a TTL with least recently used records evicted first. The
+filter is rebuilt once evictions left enough stale bits in it. With a shared result cache
+configured (`ISCC_PLAYGROUND_CACHE_URL`) local misses fall back to it and new records are written
+through, so replicas reuse each other's results.
+"""
+
+import math
+import sqlite3
+import tempfile
+import threading
+import time
+from pathlib import Path
+import numpy as np
+import orjson
+from loguru import logger as log
+import iscc_core as ic
+from demos.cache import CACHE, VERSIONS
+from demos.extended import compose_iscc, content_record
+from demos.memory import guard_decode
+from demos.options import opts
+from demos.serialize import dumps
+
+
+__all__ = [
+    "BloomFilter",
+    "ExactStore",
+    "instance_code",
+    "compute_guarded",
+    "exact_or_compute",
+    "EXACT_ISCC",
+    "EXACT_SEMANTIC",
+]
+
+
+def instance_code(digest, bits=64):
+    # type: (str, int) -> str
+    """Instance-Code from the BLAKE3 hex digest of a file (`content_digest`) without hashing it again"""
+    body = bytes.fromhex(digest)[: bits // 8]
+    return "ISCC:" + ic.encode_component(ic.MT.INSTANCE, ic.ST.NONE, ic.VS.V0, bits, body)
+
+
+def instance_key(instance):
+    # type: (str) -> int
+    """64-bit Instance-Code body as signed integer (SQLite INTEGER range)"""
+    return int.from_bytes(ic.Code(instance).hash_bytes[:8], "big", signed=True)
+
+
+class BloomFilter:
+    """Bloom filter over uniformly distributed 64-bit integer keys (double hashing of both halves)"""
+
+    def __init__(self, capacity, error_rate=0.01):
+        # type: (int, float) -> None
+        self.capacity = capacity
+        self.size = max(64, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = np.zeros(-(-self.size // 8), dtype=np.uint8)
+        self.count = 0
+
+    def _positions(self, key):
+        # type: (int) -> list[int]
+        low, high = key & 0xFFFFFFFF, ((key >> 32) & 0xFFFFFFFF) | 1
+        return [(low + i * high) % self.size for i in range(self.hashes)]
+
+    def add(self, key):
+        # type: (int) -> None
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        # type: (int) -> bool
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+
+class ExactStore:
+    """Persistent Instance-Code -> content record store with a Bloom filter front"""
+
+    def __init__(self, path, budget, ttl, capacity=None, cache=None):
+        # type: (str|Path, int, int, int|None, CacheBackend|None) -> None
+        self.path = Path(path)
+        self.cache = cache if cache is not None and cache.shared else None
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.budget = budget
+        self.ttl = ttl
+        self.capacity = capacity or opts.exact_capacity
+        self.hits = 0
+        self.shared_hits = 0
+        self.filtered = 0
+        self.false_positives = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=10, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS exact (key INTEGER PRIMARY KEY, record BLOB, size INTEGER, last_access REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS exact_last_access ON exact (last_access)")
+        with self._lock:
+            self._rebuild_filter()
+            self._evict()
+            if self.stale:
+                self._rebuild_filter()
+        log.debug(f"Loaded {self.count} exact-match records from {self.path}")
+
+    def _rebuild_filter(self):
+        """Reload counters and a filter without bits of evicted records from the table"""
+        self.count, self.usage = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM exact"
+        ).fetchone()
+        while self.count > self.capacity:
+            self.capacity *= 2
+        self.bloom = BloomFilter(self.capacity)
+        for (key,) in self._conn.execute("SELECT key FROM exact"):
+            self.bloom.add(key)
+        self.stale = 0
+
+    def get(self, instance):
+        # type: (str) -> dict|None
+        """Stored record (`units`, `fields`) for an Instance-Code or None"""
+        key = instance_key(instance)
+        if key not in self.bloom:
+            self.filtered += 1
+            return self._get_shared(instance)
+        with self._lock:
+            row = self._conn.execute("SELECT record FROM exact WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.false_positives += 1
+                return self._get_shared(instance)
+            self._conn.execute("UPDATE exact SET last_access = ? WHERE key = ?", (time.time(), key))
+        self.hits += 1
+        return orjson.loads(row[0])
+
+    def _shared_key(self, instance):
+        # type: (str) -> str
+        return f"iscc:exact:{self.path.stem}:{VERSIONS}:{instance}"
+
+    def _get_shared(self, instance):
+        # type: (str) -> dict|None
+        """Record stored by another process in the shared cache (kept locally from then on)"""
+        if self.cache is None:
+            return None
+        try:
+            data = self.cache.get(self._shared_key(instance))
+        except Exception as e:
+            log.warning(f"Cache lookup failed: {e}")
+            return None
+        if data is None:
+            return None
+        self.shared_hits += 1
+        self._insert(instance_key(instance), data)
+        return orjson.loads(data)
+
+    def put(self, instance, record):
+        # type: (str, dict) -> None
+        """Store the content record for an Instance-Code (first result wins)"""
+        data = dumps(record)
+        if self._insert(instance_key(instance), data) and self.cache is not None:
+            try:
+                self.cache.set(self._shared_key(instance), data)
+            except Exception as e:
+                log.warning(f"Cache store failed: {e}")
+
+    def _insert(self, key, data):
+        # type: (int, bytes) -> bool
+        """Add a serialized record to the table unless the key is stored already"""
+        with self._lock:
+            inserted = self._conn.execute(
+                "INSERT OR IGNORE INTO exact (key, record, size, last_access) VALUES (?, ?, ?, ?)",
+                (key, data, len(data), time.time()),
+            ).rowcount
+            if not inserted:
+                return False
+            self.count += 1
+            self.usage += len(data)
+            self.bloom.add(key)
+            self._evict()
+            if self.count > self.capacity or self.stale > self.count // 10:
+                self._rebuild_filter()
+        return True
+
+    def _evict(self):
+        """Drop expired records, then least recently used records until the table fits the budget"""
+        conn = self._conn
+        evicted = conn.execute("DELETE FROM exact WHERE last_access < ?", (time.time() - self.ttl,)).rowcount
+        if evicted:
+            self.count, self.usage = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM exact"
+            ).fetchone()
+        if self.usage > self.budget:
+            # Free a tenth of the budget in one go so evictions (and filter rebuilds) come in batches
+            excess, keys = self.usage - self.budget * 0.9, []
+            for key, size in conn.execute("SELECT key, size FROM exact ORDER BY last_access"):
+                if excess <= 0:
+                    break
+                keys.append((key,))
+                excess -= size
+                self.usage -= size
+            conn.executemany("DELETE FROM exact WHERE key = ?", keys)
+            self.count -= len(keys)
+            evicted += len(keys)
+        if evicted:
+            self.evictions += evicted
+            self.stale += evicted
+            log.debug(f"Evicted {evicted} exact-match records from {self.path.name}")
+
+    def metrics(self, name):
+        # type: (str) -> list[str]
+        """Render store state in Prometheus text exposition format"""
+        label = f'{{store="{name}"}}'
+        return [
+            f"iscc_exact_records{label} {self.count}",
+            f"iscc_exact_bytes{label} {self.usage}",
+            f"iscc_exact_budget_bytes{label} {self.budget}",
+            f"iscc_exact_evictions_total{label} {self.evictions}",
+            f"iscc_exact_hits_total{label} {self.hits}",
+            f"iscc_exact_shared_hits_total{label} {self.shared_hits}",
+            f"iscc_exact_bloom_negatives_total{label} {self.filtered}",
+            f"iscc_exact_bloom_false_positives_total{label} {self.false_positives}",
+        ]
+
+
+EXACT_ROOT = Path(opts.exact_store_dir or Path(tempfile.gettempdir()) / "iscc-playground-exact")
+EXACT_BUDGET = opts.exact_budget_mb * 1024 * 1024
+EXACT_ISCC = ExactStore(EXACT_ROOT / "iscc.db", EXACT_BUDGET, opts.exact_ttl, cache=CACHE)
+EXACT_SEMANTIC = ExactStore(EXACT_ROOT / "semantic.db", EXACT_BUDGET, opts.exact_ttl, cache=CACHE)
+
+
+def compute_guarded(compute, filepath, digest=None):
+    # type: (callable, str, str|None) -> idk.IsccMeta
+    """Run a cached `compute(filepath, digest=None)` on the original or downscaled file per decode budget"""
+    with guard_decode(filepath) as processed:
+        # A downscaled copy has other bytes than the upload, so its digest does not apply
+        return compute(processed, digest=digest if processed == filepath else None)
+
+
+def exact_or_compute(store, compute, filepath, digest):
+    # type: (ExactStore, callable, str, str) -> idk.IsccMeta
+    """
+    ISCC metadata from the content record in `store` or from `compute_guarded` for unseen files.
+
+    :param digest: Content digest of the file (`content_digest`), also the source of the Instance-Code
+    """
+    instance = instance_code(digest)
+    record = store.get(instance)
+    if record is not None:
+        return compose_iscc(filepath, record["units"], record["fields"])
+    imeta = compute_guarded(compute, filepath, digest)
+    store.put(instance, content_record(imeta))
+    return imeta
@@ -0,0 +1,53 @@
+"""Shared executor that keeps CPU-bound hashing off the event loop"""
+
+import asyncio
+import contextvars
+import multiprocessing
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from functools import lru_cache, partial
+from demos.memory import PROFILER
+from demos.options import opts
+from demos.profiling import REQUEST, SAMPLER
+
+
+EXECUTOR = ThreadPoolExecutor(max_workers=opts.executor_workers, thread_name_prefix="iscc-hash")
+
+
+@lru_cache(maxsize=1)
+def process_pool():
+    # type: () -> ProcessPoolExecutor
+    """Shared process pool for pure-Python work that needs more than one core (started on first use)"""
+    context = multiprocessing.get_context("spawn")  # Forking a threaded server is unsafe
+    return ProcessPoolExecutor(max_workers=opts.text_parallel_workers, mp_context=context)
+
+
+async def run_blocking(func, *args, **kwargs):
+    """Run a blocking function in the shared executor and await its result (a stage of profiled requests)"""
+    loop = asyncio.get_running_loop()
+    call = partial(func, *args, **kwargs)
+    request = REQUEST.get()
+    if request is not None:
+        call = partial(run_stage, request[0], getattr(func, "__qualname__", repr(func)), call)
+    return await loop.run_in_executor(EXECUTOR, partial(contextvars.copy_context().run, call))
+
+
+def run_stage(name, stage, call):
+    """Run `call` recorded as `stage` of the profiled handler `name`"""
+    with PROFILER.stage(name, stage), SAMPLER.stage(stage):
+        return call()
+
+
+def bounded_submit(submit, queue, limit):
+    """
+    Submit items from a deque with at most `limit` futures in flight and yield `(item, future)` as
+    they complete, so millions of files don't become futures at once. Items appended to `queue`
+    while iterating (e.g. retries) are submitted as well.
+    """
+    running = {}
+    while queue or running:
+        while queue and len(running) < limit:
+            item = queue.popleft()
+            running[submit(item)] = item
+        finished, _ = wait(running, return_when=FIRST_COMPLETED)
+        for future in finished:
+            yield running.pop(future), future
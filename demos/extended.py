@@ -0,0 +1,116 @@
+"""Extended ISCC-CODE generation without UI dependencies (safe to import in worker processes)"""
+
+from os.path import basename
+import iscc_core as ic
+import iscc_sdk as idk
+from demos.cache import cached
+from demos.memory import PROFILER
+from demos.options import opts
+from demos.semantic import code_image_semantic, code_image_semantic_batch
+from demos.video import code_iscc_video
+
+
+__all__ = [
+    "code_iscc",
+    "iscc_semantic",
+    "iscc_semantic_batch",
+    "content_record",
+    "compose_iscc",
+]
+
+# Fields of `idk.code_iscc` results that depend only on the file content (not on its name or metadata)
+CONTENT_FIELDS = (
+    "type_",
+    "mode",
+    "mediatype",
+    "filesize",
+    "datahash",
+    "duration",
+    "fps",
+    "width",
+    "height",
+    "characters",
+    "pages",
+    "language",
+    "features",
+    "thumbnail",
+)
+
+code_iscc = cached("iscc")(idk.code_iscc)
+
+
+@cached("semantic")
+def iscc_semantic(filepath: str) -> idk.IsccMeta:
+    """Generate ISCC-CODE extended with Semantic-Code for supported modalities (Image, Video)"""
+    mediatype, mode = idk.mediatype_and_mode(filepath)
+    if mode == "video":
+        with PROFILER.stage("iscc_semantic", "video"):
+            return code_iscc_video(filepath, frame_budget=opts.video_frame_budget)
+    with PROFILER.stage("iscc_semantic", "code_iscc"):
+        imeta = idk.code_iscc(filepath)
+    if imeta.mode == "image":
+        with PROFILER.stage("iscc_semantic", "semantic"):
+            inject_semantic(imeta, code_image_semantic(filepath, bits=64)["iscc"])
+    return imeta
+
+
+def iscc_semantic_batch(filepaths):
+    # type: (list[str]) -> list[idk.IsccMeta|Exception]
+    """
+    `iscc_semantic` for a batch of files with one inference call for all images among them.
+
+    Failures are returned in place of the result, so one broken file does not fail the batch.
+    Results are not cached (batch jobs see every file once).
+    """
+    results, images = [], []
+    for filepath in filepaths:
+        try:
+            mediatype, mode = idk.mediatype_and_mode(filepath)
+            if mode == "video":
+                results.append(code_iscc_video(filepath, frame_budget=opts.video_frame_budget))
+                continue
+            imeta = idk.code_iscc(filepath)
+            if imeta.mode == "image":
+                images.append(len(results))
+            results.append(imeta)
+        except Exception as e:
+            results.append(e)
+    codes = code_image_semantic_batch([filepaths[i] for i in images], bits=64, return_exceptions=True)
+    for i, code in zip(images, codes):
+        if isinstance(code, Exception):
+            results[i] = code
+        else:
+            inject_semantic(results[i], code["iscc"])
+    return results
+
+
+def inject_semantic(imeta, sci_code):
+    # type: (idk.IsccMeta, str) -> None
+    """Add a Semantic-Code to the ISCC-CODE of `imeta`"""
+    units = ic.iscc_decompose(imeta.iscc)
+    units.append(sci_code)
+    imeta.iscc = ic.gen_iscc_code(units)["iscc"]
+
+
+def content_record(imeta):
+    # type: (idk.IsccMeta) -> dict
+    """Content-derived `units` (all but the Meta-Code) and `fields` of ISCC metadata"""
+    units = [f"ISCC:{unit}" for unit in ic.iscc_decompose(imeta.iscc) if ic.Code(unit).maintype != ic.MT.META]
+    fields = {key: value for key, value in imeta.dict().items() if key in CONTENT_FIELDS}
+    return dict(units=units, fields=fields)
+
+
+def compose_iscc(filepath, units, fields, meta=None):
+    # type: (str, list[str], dict, idk.IsccMeta|None) -> idk.IsccMeta
+    """
+    Merge content-derived ISCC-UNITs and fields with the Meta-Code and filename of `filepath`.
+
+    Mirrors the merge order of `idk.code_iscc`. Units longer than 64 bits are truncated by the
+    ISCC-CODE composite.
+    """
+    meta = meta or idk.code_meta(filepath)
+    iscc_meta = dict(filename=basename(filepath))
+    iscc_meta.update(fields)
+    iscc_meta.update(meta.dict())
+    iscc_meta.update(ic.gen_iscc_code([meta.iscc] + list(units)))
+    return idk.IsccMeta.construct(**iscc_meta)
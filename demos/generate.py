@@ -7,11 +7,21 @@ import iscc_sdk as idk
 import iscc_sci as sci
 import iscc_schema as iss
 from PIL import Image
-import json
+from demos.cache import content_digest
+from demos.exact import EXACT_ISCC, exact_or_compute
+from demos.executor import run_blocking
+from demos.extended import code_iscc
+from demos.memory import PROFILER, DecodeBudgetExceeded
+from demos.profiling import SAMPLER
+from demos.scheduling import HEAVY
+from demos.serialize import MetaPayload, split_thumbnail
+from demos.units import BITS, long_units_guarded
+from demos.uploads import UPLOADS
 
 idk.sdk_opts.image_thumbnail_size = 240
 idk.sdk_opts.image_thumbnail_quality = 80
 
+
 custom_css = """
 .fixed-height img {
     height: 240px;  /* Fixed height */
@@ -20,22 +30,34 @@ custom_css = """
 """
 
 
-def generate_iscc(file):
-    imeta = idk.code_iscc(file.name)
-    thumbnail = None
-    if imeta.thumbnail:
-        header, encoded = imeta.thumbnail.split(",", 1)
-        data = base64.b64decode(encoded)
-        thumbnail = Image.open(io.BytesIO(data))
-    metadata = imeta.dict(exclude_unset=False, by_alias=True)
-    if metadata.get("thumbnail"):
-        del metadata["thumbnail"]
+@SAMPLER.profile
+async def generate_iscc(file, bits=64):
+    """Generate ISCC-CODE with hashing offloaded to the shared executor"""
+    # One content digest serves the upload store, the exact-match store and the result cache
+    digest = await run_blocking(content_digest, file.name)
+    stored = await run_blocking(UPLOADS.acquire, file.name, digest)
+    try:
+        imeta = await run_blocking(exact_or_compute, EXACT_ISCC, code_iscc, stored, digest)
+        iscc = await run_blocking(long_units_guarded, stored, imeta.iscc, int(bits))
+    except DecodeBudgetExceeded as e:
+        raise gr.Error(str(e))
+    finally:
+        UPLOADS.release(stored)
+    with PROFILER.stage("generate_iscc", "serialize"):
+        data_url, metadata = split_thumbnail(imeta)
+        thumbnail = None
+        if data_url:
+            header, encoded = data_url.split(",", 1)
+            data = base64.b64decode(encoded)
+            thumbnail = Image.open(io.BytesIO(data))
+        payload = MetaPayload(metadata)
     return (
-        imeta.iscc,
+        iscc,
         thumbnail,
         imeta.name,
         imeta.description,
-        json.dumps(metadata, indent=2),
+        payload.text,
+        gr.DownloadButton(value=payload.save(), visible=True),
         None,
     )
 
@@ -44,6 +66,13 @@ with gr.Blocks(title="ISCC Generator", css=custom_css) as demo:
     gr.Markdown("## ⚙️ ISCC Generator")
     with gr.Row():
         in_file = gr.File(label="Media File", elem_classes=["fixed-height"])
+    with gr.Row():
+        in_bits = gr.Radio(
+            choices=list(BITS),
+            value=64,
+            label="Code Length",
+            info="BITS PER ISCC-UNIT (LONGER UNITS ARE SHOWN AS SEPARATE ISCC-UNITS)",
+        )
     with gr.Row():
         out_iscc = gr.Text(
             label="ISCC",
@@ -67,10 +96,12 @@ with gr.Blocks(title="ISCC Generator", css=custom_css) as demo:
     with gr.Row():
         with gr.Accordion(label="ISCC Metadata", open=False):
             out_meta = gr.Code(language="json", label="JSON-LD")
+            out_download = gr.DownloadButton("Download JSON-LD", size="sm", visible=False)
     in_file.upload(
-        generate_iscc,
-        inputs=[in_file],
-        outputs=[out_iscc, out_thumbnail, out_name, out_description, out_meta, in_file],
+        HEAVY.limit(generate_iscc),
+        inputs=[in_file, in_bits],
+        outputs=[out_iscc, out_thumbnail, out_name, out_description, out_meta, out_download, in_file],
+        concurrency_limit=None,
     )
 
     # Custom footer
@@ -0,0 +1,268 @@
+"""Granular text similarity search over a chunk-feature index.
+
+Each document is chunked with `text_chunk_features` and every chunk simhash is stored as a row
+of compact integer arrays (feature, doc id, offset). Lookups tolerate a few flipped bits using
+multi-index hashing: the 64-bit features are split into bands and by the pigeonhole principle
+any feature within `BANDS - 1` bits of the query matches at least one band exactly.
+
+Build an index from a directory of `.txt` files with `python -m demos.granular <dir> <index.npz>`.
+"""
+
+import sys
+from collections import defaultdict
+from itertools import repeat
+from pathlib import Path
+import numpy as np
+import xxhash
+import iscc_core as ic
+import iscc_sdk as idk
+from iscc_core.cdc import alg_cdc_params
+from loguru import logger as log
+from demos.executor import process_pool
+from demos.options import opts
+
+
+__all__ = [
+    "text_chunk_features",
+    "chunk_features",
+    "parallel_chunk_features",
+    "ChunkIndex",
+    "BANDS",
+]
+
+BANDS = 4
+BAND_BITS = 64 // BANDS
+POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def text_chunk_features(text, chunk_size):
+    # type: (str, int) -> tuple[list[str], list[str]]
+    """
+    Chunk cleaned text and calculate a similarity hash per chunk.
+
+    Same algorithm as `idk.text_features` but with an explicit chunk size instead of mutating
+    the global `idk.sdk_opts` which would race between concurrent requests. Texts of at least
+    `ISCC_PLAYGROUND_TEXT_PARALLEL_MIN_SIZE` characters are chunked in parallel.
+    """
+    cleaned = ic.text_clean(text)
+    if opts.text_parallel_workers > 1 and len(cleaned) >= opts.text_parallel_min_size:
+        return parallel_chunk_features(cleaned, chunk_size, opts.text_parallel_workers)
+    return chunk_features(cleaned, chunk_size)
+
+
+def chunk_features(cleaned, chunk_size):
+    # type: (str, int) -> tuple[list[str], list[str]]
+    """Chunk already cleaned text and calculate a similarity hash per chunk"""
+    chunks = list(idk.text_chunks(cleaned, avg_size=chunk_size))
+    features = []
+    for chunk in chunks:
+        ngrams = (
+            "".join(chars)
+            for chars in ic.sliding_window(ic.text_collapse(chunk), idk.core_opts.text_ngram_size)
+        )
+        hashes = [xxhash.xxh32_intdigest(ngram.encode("utf-8")) for ngram in ngrams]
+        features.append(ic.encode_base64(ic.alg_minhash_64(hashes)))
+    return chunks, features
+
+
+def parallel_chunk_features(cleaned, chunk_size, workers, pool=None):
+    # type: (str, int, int, Executor|None) -> tuple[list[str], list[str]]
+    """
+    Chunk already cleaned text on multiple processes with the exact result of `chunk_features`.
+
+    The text is split into one segment per worker, each extended by an overlap into the next
+    segment. A segment is chunked as if it was a text of its own, so its first boundaries are
+    arbitrary. But a cut point only depends on the chunk start, so once the chunks of a segment
+    reach a chunk start of the next segment, both agree from there on and the results are
+    stitched at that boundary. A chunk counts only if its cut point was not limited by the end
+    of its segment. Segments that never resync are chunked again from the last stitched boundary.
+    """
+    max_size = alg_cdc_params(chunk_size * 4)[1] // 4 + 1  # Max chunk size in characters
+    size = len(cleaned)
+    step = max(-(-size // workers), 64 * max_size)
+    if size <= step:
+        return chunk_features(cleaned, chunk_size)
+    overlap = 32 * max_size
+    spans = [(start, min(start + step + overlap, size)) for start in range(0, size, step)]
+    pool = pool or process_pool()
+    results = pool.map(chunk_features, [cleaned[a:b] for a, b in spans], repeat(chunk_size))
+
+    def chunk_starts(start, chunks):
+        # type: (int, list[str]) -> dict[int, int]
+        starts = {}
+        for number, chunk in enumerate(chunks):
+            starts[start] = number
+            start += len(chunk)
+        return starts
+
+    segments = [
+        (a, b, chunks, features, chunk_starts(a, chunks)) for (a, b), (chunks, features) in zip(spans, results)
+    ]
+    out_chunks, out_features, pos = [], [], 0
+    for number, (start, stop, chunks, features, starts) in enumerate(segments):
+        if pos == size:
+            break  # An earlier segment reached the end of the text through its overlap
+        if pos not in starts:
+            log.debug(f"Chunk segment {number} did not resync, chunking again from {pos}")
+            start = pos
+            chunks, features = chunk_features(cleaned[start:stop], chunk_size)
+            starts = chunk_starts(start, chunks)
+        following = segments[number + 1] if number + 1 < len(segments) else None
+        for chunk, feature in zip(chunks[starts[pos] :], features[starts[pos] :]):
+            if following and pos >= following[0] and pos in following[4]:
+                break  # Stitch: the following segment continues from this boundary
+            if stop < size and pos + max_size > stop:
+                break  # Cut point may be limited by the end of the segment
+            out_chunks.append(chunk)
+            out_features.append(feature)
+            pos += len(chunk)
+    return out_chunks, out_features
+
+
+def feature_to_int(feature):
+    # type: (str) -> int
+    """Decode base64 chunk feature into unsigned 64-bit integer"""
+    return int.from_bytes(ic.decode_base64(feature), "big")
+
+
+def hamming(a, b):
+    # type: (np.ndarray, np.ndarray) -> np.ndarray
+    """Vectorized Hamming distance between uint64 arrays"""
+    xor = np.bitwise_xor(a, b)
+    return POPCOUNT[xor.view(np.uint8)].reshape(-1, 8).sum(axis=1)
+
+
+class ChunkIndex:
+    """Chunk-level feature index stored as sorted integer arrays"""
+
+    def __init__(self, chunk_size=1024):
+        # type: (int) -> None
+        self.chunk_size = chunk_size
+        self.names = []  # type: list[str]
+        self.features = np.empty(0, dtype=np.uint64)
+        self.doc_ids = np.empty(0, dtype=np.uint32)
+        self.offsets = np.empty(0, dtype=np.uint32)
+        self._pending = []  # type: list[tuple[np.ndarray, np.ndarray, np.ndarray]]
+        self._bands = []  # type: list[tuple[np.ndarray, np.ndarray]]
+
+    def __len__(self):
+        return len(self.features) + sum(len(f) for f, _, _ in self._pending)
+
+    def add(self, name, text):
+        # type: (str, str) -> None
+        """Chunk a document and queue its features for indexing"""
+        chunks, features = text_chunk_features(text, self.chunk_size)
+        offsets = np.cumsum([0] + [len(chunk) for chunk in chunks[:-1]], dtype=np.uint32)
+        doc_id = len(self.names)
+        self.names.append(name)
+        feats = np.array([feature_to_int(f) for f in features], dtype=np.uint64)
+        self._pending.append((feats, np.full(len(feats), doc_id, dtype=np.uint32), offsets))
+        self._bands = []
+
+    def _build(self):
+        """Merge pending documents and rebuild the per-band sorted lookup tables"""
+        if self._pending:
+            self.features = np.concatenate([self.features] + [f for f, _, _ in self._pending])
+            self.doc_ids = np.concatenate([self.doc_ids] + [d for _, d, _ in self._pending])
+            self.offsets = np.concatenate([self.offsets] + [o for _, _, o in self._pending])
+            self._pending = []
+        self._bands = []
+        for band in range(BANDS):
+            values = self._band(self.features, band)
+            order = np.argsort(values, kind="stable").astype(np.uint32)
+            self._bands.append((values[order], order))
+
+    @staticmethod
+    def _band(features, band):
+        # type: (np.ndarray, int) -> np.ndarray
+        shift = np.uint64(BAND_BITS * band)
+        mask = np.uint64((1 << BAND_BITS) - 1)
+        return ((features >> shift) & mask).astype(np.uint16)
+
+    def search(self, text, max_distance=BANDS - 1, limit=20):
+        # type: (str, int, int) -> list[dict]
+        """
+        Find documents containing near-identical passages.
+
+        :param str text: Query passage
+        :param int max_distance: Max Hamming distance between chunk features (at most `BANDS - 1`)
+        :param int limit: Max number of documents returned
+        :return: Hits ranked by number of matched passage characters
+        """
+        if max_distance >= BANDS:
+            raise ValueError(f"max_distance must be smaller than {BANDS}")
+        if self._pending or not self._bands:
+            self._build()
+        chunks, features = text_chunk_features(text, self.chunk_size)
+        query = np.array([feature_to_int(f) for f in features], dtype=np.uint64)
+
+        matched = defaultdict(dict)  # doc_id -> {query chunk number: offset}
+        for qpos, feature in enumerate(query):
+            candidates = []
+            for band, (values, order) in enumerate(self._bands):
+                key = self._band(query[qpos : qpos + 1], band)[0]
+                lo, hi = np.searchsorted(values, key, "left"), np.searchsorted(values, key, "right")
+                candidates.append(order[lo:hi])
+            rows = np.unique(np.concatenate(candidates))
+            if not len(rows):
+                continue
+            dist = hamming(self.features[rows], np.full(len(rows), feature, dtype=np.uint64))
+            for row in rows[dist <= max_distance]:
+                matched[int(self.doc_ids[row])].setdefault(qpos, int(self.offsets[row]))
+
+        total = sum(len(chunk) for chunk in chunks) or 1
+        hits = []
+        for doc_id, positions in matched.items():
+            size = sum(len(chunks[qpos]) for qpos in positions)
+            hits.append(
+                dict(
+                    name=self.names[doc_id],
+                    doc_id=doc_id,
+                    coverage=size / total,
+                    chunks=len(positions),
+                    offsets=sorted(set(positions.values())),
+                )
+            )
+        hits.sort(key=lambda hit: hit["coverage"], reverse=True)
+        return hits[:limit]
+
+    def save(self, path):
+        # type: (str|Path) -> None
+        """Store index as compressed numpy archive"""
+        self._build()
+        np.savez_compressed(
+            path,
+            chunk_size=self.chunk_size,
+            names=np.array(self.names),
+            features=self.features,
+            doc_ids=self.doc_ids,
+            offsets=self.offsets,
+        )
+
+    @classmethod
+    def load(cls, path):
+        # type: (str|Path) -> ChunkIndex
+        """Load index from numpy archive"""
+        data = np.load(path)
+        index = cls(chunk_size=int(data["chunk_size"]))
+        index.names = data["names"].tolist()
+        index.features = data["features"]
+        index.doc_ids = data["doc_ids"]
+        index.offsets = data["offsets"]
+        index._build()
+        return index
+
+    @classmethod
+    def from_directory(cls, path, chunk_size=1024):
+        # type: (str|Path, int) -> ChunkIndex
+        """Build index from all `.txt` files in a directory tree"""
+        index = cls(chunk_size=chunk_size)
+        for fp in sorted(Path(path).rglob("*.txt")):
+            index.add(fp.name, fp.read_text(encoding="utf-8", errors="ignore"))
+        index._build()
+        log.info(f"Indexed {len(index.names)} documents with {len(index)} chunks")
+        return index
+
+
+if __name__ == "__main__":
+    ChunkIndex.from_directory(sys.argv[1]).save(sys.argv[2])
@@ -2,8 +2,11 @@
 from loguru import logger as log
 import gradio as gr
 import iscc_core as ic
+from demos.profiling import SAMPLER
+from demos.scheduling import LIGHT
 
 
+@SAMPLER.profile
 def explain_iscc(code):
     result = [gr.Column(visible=True), None, None, None, None, None, None, None, None]
     if not code:
@@ -116,7 +119,7 @@ with gr.Blocks() as demo:
                     )
 
     in_iscc.change(
-        explain_iscc,
+        LIGHT.limit(explain_iscc),
         inputs=[in_iscc],
         outputs=[
             out_column,
@@ -130,6 +133,7 @@ with gr.Blocks() as demo:
             out_base64_url,
         ],
         show_progress="hidden",
+        concurrency_limit=None,
     )
 
 if __name__ == "__main__":
@@ -0,0 +1,223 @@
+"""Per-stage peak memory profiling and a decode-size guard for uploaded media.
+
+With `ISCC_PLAYGROUND_MEMORY_PROFILE=true` every instrumented stage records the peak Python heap
+(tracemalloc) and the peak process RSS (sampled by a background thread) while it runs. Both are
+process-wide, so concurrent requests overlap in the numbers; profile with low concurrency for
+exact attribution.
+
+The decode guard estimates the peak decoded size of an input from its header before any pixel
+data is read and rejects inputs above `ISCC_PLAYGROUND_DECODE_BUDGET_MB`:
+
+- images - all frames at full resolution
+- PDFs - the first page rasterised for the thumbnail (72 dpi RGB)
+- videos - the frames ffmpeg buffers at full resolution (thumbnail filter and decoder references)
+
+In `downscale` mode JPEGs are instead decoded at a reduced scale into a derivative file, so the
+Data- and Instance-Code then describe the derivative. Other formats can't be downscaled without a
+full decode and are rejected.
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+import pymupdf
+from PIL import Image, UnidentifiedImageError
+from loguru import logger as log
+import iscc_sdk as idk
+from demos.options import opts
+from demos.video import video_frame_size
+
+
+__all__ = [
+    "DecodeBudgetExceeded",
+    "MemoryProfiler",
+    "PROFILER",
+    "estimate_decode_size",
+    "guard_decode",
+]
+
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+VIDEO_BUFFERED_FRAMES = 116  # ffmpeg `thumbnail` filter keeps 100 frames, plus up to 16 reference frames
+
+
+def current_rss():
+    # type: () -> int
+    """Resident set size of this process in bytes (0 where /proc is unavailable)"""
+    try:
+        with open("/proc/self/statm") as infile:
+            return int(infile.read().split()[1]) * PAGE_SIZE
+    except OSError:
+        return 0
+
+
+class MemoryProfiler:
+    """Record peak memory per (function, stage)"""
+
+    def __init__(self, enabled=False, interval=0.01):
+        # type: (bool, float) -> None
+        self.enabled = enabled
+        self.interval = interval
+        self.peaks = {}  # type: dict[tuple[str, str], dict]
+        self._active = {}  # type: dict[object, list[int]] - running stage -> [rss peak]
+        self._lock = threading.Lock()
+        self._sampler = None
+        if enabled:
+            tracemalloc.start()
+
+    def _sample(self):
+        while True:
+            rss = current_rss()
+            with self._lock:
+                for peak in self._active.values():
+                    peak[0] = max(peak[0], rss)
+            time.sleep(self.interval)
+
+    @contextmanager
+    def stage(self, func, stage):
+        # type: (str, str) -> None
+        """Measure peak memory while the block runs"""
+        if not self.enabled:
+            yield
+            return
+        key, peak = object(), [current_rss()]
+        with self._lock:
+            if self._sampler is None:
+                self._sampler = threading.Thread(target=self._sample, name="rss-sampler", daemon=True)
+                self._sampler.start()
+            self._active[key] = peak
+        rss_start = peak[0]
+        heap_start, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        try:
+            yield
+        finally:
+            _, heap_peak = tracemalloc.get_traced_memory()
+            with self._lock:
+                del self._active[key]
+                peak[0] = max(peak[0], current_rss())
+                rss_delta, heap_delta = peak[0] - rss_start, heap_peak - heap_start
+                record = self.peaks.setdefault((func, stage), dict(count=0, rss_peak=0, heap_peak=0))
+                record["count"] += 1
+                record["rss_peak"] = max(record["rss_peak"], rss_delta)
+                record["heap_peak"] = max(record["heap_peak"], heap_delta)
+            log.info(
+                f"Memory {func}/{stage}: RSS +{rss_delta / 2**20:.1f} MB (peak {peak[0] / 2**20:.1f} MB), "
+                f"Python heap +{heap_delta / 2**20:.1f} MB"
+            )
+
+    def metrics(self):
+        # type: () -> list[str]
+        """Render stage peaks in Prometheus text exposition format"""
+        lines = [f"iscc_memory_rss_bytes {current_rss()}"]
+        with self._lock:
+            for (func, stage), record in sorted(self.peaks.items()):
+                label = f'{{func="{func}",stage="{stage}"}}'
+                lines.append(f"iscc_memory_stage_rss_peak_bytes{label} {record['rss_peak']}")
+                lines.append(f"iscc_memory_stage_heap_peak_bytes{label} {record['heap_peak']}")
+                lines.append(f"iscc_memory_stage_count{label} {record['count']}")
+        return lines
+
+
+PROFILER = MemoryProfiler(enabled=opts.memory_profile, interval=opts.memory_sample_ms / 1000)
+
+
+class DecodeBudgetExceeded(ValueError):
+    """Estimated decoded size of a media file exceeds the configured budget"""
+
+
+def estimate_decode_size(filepath):
+    # type: (str) -> int|None
+    """Estimate peak decoded size in bytes from the header (None if the file is not decoded to pixels)"""
+    try:
+        mediatype, mode = idk.mediatype_and_mode(filepath)
+    except idk.IsccUnsupportedMediatype:
+        return None
+    if mediatype == "application/pdf":
+        return estimate_pdf_size(filepath)
+    if mode == "video":
+        return estimate_video_size(filepath)
+    if mode == "image":
+        return estimate_image_size(filepath)
+    return None
+
+
+def estimate_image_size(filepath):
+    # type: (str) -> int|None
+    """Decoded size of all image frames in bytes"""
+    try:
+        with Image.open(filepath) as image:
+            band_bytes = 4 if image.mode in ("I", "F") else 2 if "16" in image.mode else 1
+            frames = getattr(image, "n_frames", 1)
+            return image.width * image.height * len(image.getbands()) * band_bytes * frames
+    except (UnidentifiedImageError, OSError):
+        return None
+    except Image.DecompressionBombError:
+        return 2**63
+
+
+def estimate_pdf_size(filepath):
+    # type: (str) -> int|None
+    """Size of the first page rasterised at 72 dpi as RGB (as for the thumbnail) in bytes"""
+    try:
+        with pymupdf.open(filepath) as doc:
+            if not doc.page_count:
+                return None
+            rect = doc[0].rect
+            return int(rect.width) * int(rect.height) * 3
+    except (pymupdf.FileDataError, RuntimeError):
+        return None
+
+
+def estimate_video_size(filepath):
+    # type: (str) -> int|None
+    """Size of the full resolution YUV 4:2:0 frames ffmpeg buffers while decoding in bytes"""
+    try:
+        size = video_frame_size(filepath)
+    except Exception as e:
+        log.warning(f"Failed to read video frame size: {e}")
+        return None
+    if size is None:
+        return None
+    width, height = size
+    return width * height * 3 // 2 * VIDEO_BUFFERED_FRAMES
+
+
+@contextmanager
+def guard_decode(filepath):
+    # type: (str) -> str
+    """Yield the filepath to process (original or downscaled copy) or raise `DecodeBudgetExceeded`"""
+    budget = opts.decode_budget_mb * 2**20
+    size = estimate_decode_size(filepath) if budget else None
+    if size is None or size <= budget:
+        yield filepath
+        return
+    message = (
+        f"Estimated decoded size of {size / 2**20:.0f} MB exceeds the budget of {opts.decode_budget_mb} MB"
+    )
+    if opts.decode_guard != "downscale":
+        raise DecodeBudgetExceeded(message)
+    try:
+        image = Image.open(filepath)
+    except (Image.DecompressionBombError, UnidentifiedImageError):
+        raise DecodeBudgetExceeded(message)  # Too large to open or not an image (PDF, video)
+    with image:
+        if image.format != "JPEG":
+            raise DecodeBudgetExceeded(message)
+        factor = next((f for f in (2, 4, 8) if size / f**2 <= budget), None)
+        if factor is None:
+            raise DecodeBudgetExceeded(message)
+        # JPEG draft mode decodes at 1/2, 1/4 or 1/8 scale directly from the DCT coefficients
+        image.draft(image.mode, (-(-image.width // factor), -(-image.height // factor)))
+        tmp_dir = tempfile.mkdtemp(prefix="iscc-downscaled-")
+        target = Path(tmp_dir) / Path(filepath).name
+        image.save(target, quality=95, exif=image.info.get("exif", b""))
+        log.warning(f"{message} - processing downscaled copy {image.width}x{image.height}")
+    try:
+        yield target.as_posix()
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
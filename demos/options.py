@@ -0,0 +1,213 @@
+"""Playground options can be configured using environment variables prefixed with `ISCC_PLAYGROUND_`.
+
+Example: `ISCC_PLAYGROUND_HEAVY_CONCURRENCY=4` allows four concurrent uploads to be hashed.
+"""
+
+try:
+    from pydantic.v1 import Field, BaseSettings
+except ImportError:  # pragma: no cover
+    from pydantic import Field, BaseSettings
+
+
+__all__ = [
+    "PlaygroundOptions",
+    "opts",
+]
+
+
+class PlaygroundOptions(BaseSettings):
+    """Playground Configuration Options"""
+
+    class Config:
+        validate_assignment = True
+        env_prefix = "ISCC_PLAYGROUND_"
+        env_file = "iscc-playground.env"
+        env_file_encoding = "utf-8"
+
+    executor_workers: int = Field(
+        4,
+        description="ISCC_PLAYGROUND_EXECUTOR_WORKERS - Number of threads for CPU-bound hashing",
+    )
+
+    heavy_concurrency: int = Field(
+        2,
+        description="ISCC_PLAYGROUND_HEAVY_CONCURRENCY - Concurrent hashing requests (uploads)",
+    )
+
+    heavy_queue_size: int = Field(
+        8,
+        description="ISCC_PLAYGROUND_HEAVY_QUEUE_SIZE - Max waiting hashing requests",
+    )
+
+    light_concurrency: int = Field(
+        8,
+        description="ISCC_PLAYGROUND_LIGHT_CONCURRENCY - Concurrent cheap requests",
+    )
+
+    light_queue_size: int = Field(
+        32,
+        description="ISCC_PLAYGROUND_LIGHT_QUEUE_SIZE - Max waiting cheap requests",
+    )
+
+    cache_url: str = Field(
+        "memory://",
+        description="ISCC_PLAYGROUND_CACHE_URL - Result cache backend (memory://, sqlite:///path, redis://host:port/db)",
+    )
+
+    cache_memory_items: int = Field(
+        1024,
+        description="ISCC_PLAYGROUND_CACHE_MEMORY_ITEMS - Max entries of the in-memory result cache",
+    )
+
+    cache_ttl: int = Field(
+        0,
+        description="ISCC_PLAYGROUND_CACHE_TTL - Expiry of Redis and SQLite cache entries in seconds (0 = never)",
+    )
+
+    cache_sqlite_budget_mb: int = Field(
+        512,
+        description="ISCC_PLAYGROUND_CACHE_SQLITE_BUDGET_MB - Max size of SQLite cache values in MB (0 = no limit)",
+    )
+
+    text_index_path: str = Field(
+        "",
+        description="ISCC_PLAYGROUND_TEXT_INDEX_PATH - Chunk-feature index (.npz) for passage search (default: samples)",
+    )
+
+    text_index_chunk_size: int = Field(
+        128,
+        description="ISCC_PLAYGROUND_TEXT_INDEX_CHUNK_SIZE - Avg chunk size when indexing the bundled samples",
+    )
+
+    video_frame_budget: int = Field(
+        16,
+        description="ISCC_PLAYGROUND_VIDEO_FRAME_BUDGET - Max sampled frames for video semantic inference",
+    )
+
+    semantic_batch_size: int = Field(
+        16,
+        description="ISCC_PLAYGROUND_SEMANTIC_BATCH_SIZE - Max images per batched semantic inference call",
+    )
+
+    semantic_batch_window_ms: int = Field(
+        10,
+        description="ISCC_PLAYGROUND_SEMANTIC_BATCH_WINDOW_MS - Time window for collecting a semantic batch",
+    )
+
+    semantic_model: str = Field(
+        "reference",
+        description="ISCC_PLAYGROUND_SEMANTIC_MODEL - Semantic model variant: 'reference', 'optimized' or 'int8'",
+    )
+
+    semantic_intra_threads: int = Field(
+        0,
+        description="ISCC_PLAYGROUND_SEMANTIC_INTRA_THREADS - Threads within a model operator (0 = all cores)",
+    )
+
+    semantic_inter_threads: int = Field(
+        0,
+        description="ISCC_PLAYGROUND_SEMANTIC_INTER_THREADS - Threads across parallel model operators (0 = default)",
+    )
+
+    upload_dir: str = Field(
+        "",
+        description="ISCC_PLAYGROUND_UPLOAD_DIR - Managed upload store directory (default: system temp dir)",
+    )
+
+    upload_budget_mb: int = Field(
+        1024,
+        description="ISCC_PLAYGROUND_UPLOAD_BUDGET_MB - Max disk usage of the upload store in MB",
+    )
+
+    upload_ttl: int = Field(
+        3600,
+        description="ISCC_PLAYGROUND_UPLOAD_TTL - Seconds after last use before uploads are evicted",
+    )
+
+    metadata_pretty: bool = Field(
+        True,
+        description="ISCC_PLAYGROUND_METADATA_PRETTY - Indent metadata JSON (compact output if disabled)",
+    )
+
+    memory_profile: bool = Field(
+        False,
+        description="ISCC_PLAYGROUND_MEMORY_PROFILE - Record peak memory per request stage (adds overhead)",
+    )
+
+    memory_sample_ms: int = Field(
+        10,
+        description="ISCC_PLAYGROUND_MEMORY_SAMPLE_MS - RSS sampling interval of the memory profiler",
+    )
+
+    decode_budget_mb: int = Field(
+        0,
+        description="ISCC_PLAYGROUND_DECODE_BUDGET_MB - Max estimated decoded media size in MB (0 = no limit)",
+    )
+
+    decode_guard: str = Field(
+        "reject",
+        description="ISCC_PLAYGROUND_DECODE_GUARD - Action for inputs over budget: 'reject' or 'downscale' (JPEG only)",
+    )
+
+    profile_sample_rate: float = Field(
+        0.0,
+        description="ISCC_PLAYGROUND_PROFILE_SAMPLE_RATE - Fraction of requests to profile (0 = disabled)",
+    )
+
+    profile_interval_ms: int = Field(
+        5,
+        description="ISCC_PLAYGROUND_PROFILE_INTERVAL_MS - Stack sampling interval of the profiler",
+    )
+
+    admin_token: str = Field(
+        "",
+        description="ISCC_PLAYGROUND_ADMIN_TOKEN - Bearer token for admin routes (disabled if empty)",
+    )
+
+    search_index_path: str = Field(
+        "",
+        description="ISCC_PLAYGROUND_SEARCH_INDEX_PATH - Corpus index for SEARCH (default: bundled sample sets)",
+    )
+
+    search_shard_size: int = Field(
+        262144,
+        description="ISCC_PLAYGROUND_SEARCH_SHARD_SIZE - Max rows scanned between streamed SEARCH updates",
+    )
+
+    exact_store_dir: str = Field(
+        "",
+        description="ISCC_PLAYGROUND_EXACT_STORE_DIR - Exact-duplicate result store directory (default: system temp dir)",
+    )
+
+    exact_capacity: int = Field(
+        1_000_000,
+        description="ISCC_PLAYGROUND_EXACT_CAPACITY - Expected records per exact-duplicate store (Bloom filter size)",
+    )
+
+    exact_budget_mb: int = Field(
+        256,
+        description="ISCC_PLAYGROUND_EXACT_BUDGET_MB - Max disk usage per exact-duplicate store in MB",
+    )
+
+    exact_ttl: int = Field(
+        7 * 24 * 3600,
+        description="ISCC_PLAYGROUND_EXACT_TTL - Seconds after last use before exact-duplicate records are evicted",
+    )
+
+    chunker_max_mb: int = Field(
+        64,
+        description="ISCC_PLAYGROUND_CHUNKER_MAX_MB - Max MB of a file the binary chunker processes (rest skipped)",
+    )
+
+    text_parallel_workers: int = Field(
+        4,
+        description="ISCC_PLAYGROUND_TEXT_PARALLEL_WORKERS - Processes for chunking large texts (1 = serial)",
+    )
+
+    text_parallel_min_size: int = Field(
+        1_000_000,
+        description="ISCC_PLAYGROUND_TEXT_PARALLEL_MIN_SIZE - Min characters of a text to chunk in parallel",
+    )
+
+
+opts = PlaygroundOptions()
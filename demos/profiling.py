@@ -0,0 +1,233 @@
+"""Opt-in statistical profiler for live requests.
+
+A fraction (`ISCC_PLAYGROUND_PROFILE_SAMPLE_RATE`) of calls to profiled tab handlers register
+their thread with a sampler thread that periodically captures Python stacks via
+`sys._current_frames()`. Stacks are aggregated per handler in the collapsed format understood by
+flamegraph.pl and speedscope (`frame;frame;frame count`). Unsampled calls only pay for one random
+number.
+
+Async handlers run their work in the shared executor (`demos.executor.run_blocking`). Every such
+call of a profiled request is recorded as a stage of its handler, under `<handler>;[<function>]`,
+and with `ISCC_PLAYGROUND_MEMORY_PROFILE` its peak memory is recorded under the same names.
+Executor functions hand work to further threads (the thread pool of `idk.code_iscc`, the semantic
+batcher), so while any call is tracked the busy stacks of all other threads are recorded too, under
+`<handler>;[<thread name>]`. Like the memory profiler this is process-wide: with concurrent
+tracked calls worker stacks are counted for each of them, so profile with low concurrency for exact
+attribution.
+"""
+
+import asyncio
+import contextvars
+import functools
+import inspect
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from os.path import basename
+from demos.options import opts
+
+
+__all__ = [
+    "StackSampler",
+    "SAMPLER",
+    "REQUEST",
+]
+
+# Handler name and sampling decision of the running request (set by `StackSampler.profile`)
+REQUEST = contextvars.ContextVar("profiled_request", default=None)  # type: contextvars.ContextVar
+
+
+# Innermost frames of threads that are blocked waiting for work (not worth recording)
+IDLE_FRAMES = {("threading.py", "wait"), ("selectors.py", "select"), ("thread.py", "_worker")}
+
+
+def frame_label(frame):
+    # type: (object) -> str
+    code = frame.f_code
+    return f"{code.co_name} ({basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def is_idle(frame):
+    # type: (object) -> bool
+    return (basename(frame.f_code.co_filename), frame.f_code.co_name) in IDLE_FRAMES
+
+
+def collapse(frame):
+    # type: (object) -> str
+    """Render a stack outermost frame first"""
+    stack = []
+    while frame is not None:
+        stack.append(frame_label(frame))
+        frame = frame.f_back
+    return ";".join(reversed(stack))
+
+
+class StackSampler:
+    """Sample stacks of threads running profiled functions and aggregate them per function"""
+
+    def __init__(self, rate=0.0, interval=0.005):
+        # type: (float, float) -> None
+        self.rate = rate
+        self.interval = interval
+        self.stacks = defaultdict(Counter)  # type: dict[str, Counter]
+        self.calls = Counter()  # type: Counter
+        self._threads = {}  # type: dict[int, tuple[str, str]] - thread id -> (handler, stack prefix)
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._worker = None
+
+    def sample(self, name):
+        # type: (str) -> bool
+        """Decide whether to profile a call of `name` (for a `rate` fraction of calls)"""
+        if not self.rate or random.random() >= self.rate:
+            return False
+        with self._lock:
+            self.calls[name] += 1
+        return True
+
+    @contextmanager
+    def track(self, name):
+        # type: (str) -> None
+        """Sample the current thread while the block runs (for a `rate` fraction of calls)"""
+        if not self.sample(name):
+            yield
+            return
+        with self._register(name, name):
+            yield
+
+    @contextmanager
+    def stage(self, stage):
+        # type: (str) -> None
+        """Sample the current thread as `stage` of the running request if that request is sampled"""
+        request = REQUEST.get()
+        if request is None or not request[1]:
+            yield
+            return
+        with self._register(request[0], f"{request[0]};[{stage}]"):
+            yield
+
+    @contextmanager
+    def _register(self, name, prefix):
+        # type: (str, str) -> None
+        thread_id = threading.get_ident()
+        with self._lock:
+            self._threads[thread_id] = (name, prefix)
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+                self._worker.start()
+        self._wakeup.set()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._threads.pop(thread_id, None)
+
+    def profile(self, func):
+        """
+        Decorate a handler to be tracked under its own name.
+
+        Sync handlers are sampled on their own thread. Async handlers (coroutines and async
+        generators) mark their request, so the executor calls they await are sampled as stages.
+        """
+        name = func.__name__
+        if not (inspect.iscoroutinefunction(func) or inspect.isasyncgenfunction(func)):
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.track(name):
+                    return func(*args, **kwargs)
+
+            return wrapper
+
+        def request_context():
+            # type: () -> contextvars.Context|None
+            sampled = self.sample(name)
+            if not sampled and not opts.memory_profile:
+                return None
+            context = contextvars.copy_context()
+            context.run(REQUEST.set, (name, sampled))
+            return context
+
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                context = request_context()
+                if context is None:
+                    return await func(*args, **kwargs)
+                return await asyncio.create_task(func(*args, **kwargs), context=context)
+
+            return wrapper
+
+        async def step(updates):
+            try:
+                return False, await updates.__anext__()
+            except StopAsyncIteration:
+                return True, None
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            context = request_context()
+            if context is None:
+                async for update in func(*args, **kwargs):
+                    yield update
+                return
+            # Gradio may advance the generator from different tasks, so each step runs in the request context
+            updates = func(*args, **kwargs)
+            try:
+                while True:
+                    done, update = await asyncio.create_task(step(updates), context=context)
+                    if done:
+                        return
+                    yield update
+            finally:
+                await asyncio.create_task(updates.aclose(), context=context)
+
+        return wrapper
+
+    def _run(self):
+        while True:
+            with self._lock:
+                threads = dict(self._threads)
+                if not threads:
+                    self._wakeup.clear()
+            if not threads:
+                self._wakeup.wait()
+                continue
+            frames = sys._current_frames()
+            active = sorted({name for name, _ in threads.values()})
+            labels = {thread.ident: re.sub(r"[-_]\d+", "", thread.name) for thread in threading.enumerate()}
+            samples = []
+            for thread_id, frame in frames.items():
+                if thread_id in threads:
+                    name, prefix = threads[thread_id]
+                    samples.append((name, f"{prefix};{collapse(frame)}"))
+                elif thread_id != threading.get_ident() and not is_idle(frame):
+                    stack = collapse(frame)
+                    label = labels.get(thread_id, "thread")
+                    samples.extend((name, f"{name};[{label}];{stack}") for name in active)
+            frames = frame = None  # Do not keep frames alive while sleeping
+            with self._lock:
+                for name, stack in samples:
+                    self.stacks[name][stack] += 1
+            time.sleep(self.interval)
+
+    def collapsed(self, name=None):
+        # type: (str|None) -> str
+        """Render aggregated stacks (of one or all functions) in collapsed flamegraph format"""
+        with self._lock:
+            names = [name] if name else sorted(self.stacks)
+            lines = [f"{stack} {count}" for n in names for stack, count in self.stacks.get(n, {}).items()]
+        return "\n".join(lines) + "\n" if lines else ""
+
+    def reset(self):
+        with self._lock:
+            self.stacks.clear()
+            self.calls.clear()
+
+
+SAMPLER = StackSampler(rate=opts.profile_sample_rate, interval=opts.profile_interval_ms / 1000)
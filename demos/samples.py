@@ -0,0 +1,124 @@
+"""
+Precomputed ISCCs, metadata and thumbnails for the bundled COMPARE sample sets.
+
+The artifact is stored in `precomputed/<iscc-core>-<iscc-sdk>-<iscc-sci>/` so it is rebuilt
+whenever one of the versions changes. Samples are looked up by content digest, because Gradio
+hands event handlers a copy of the example file in its cache folder, not the bundled path. Only
+the content-derived units and fields are stored for lookups: an upload of the same bytes under
+another name gets its own Meta-Code, name and filename (see `demos.extended.compose_iscc`).
+Build it ahead of time with `python -m demos.samples` (the deployment workflow does).
+"""
+
+import base64
+import shutil
+import threading
+from pathlib import Path
+import orjson
+from loguru import logger as log
+from demos.cache import VERSIONS, content_digest
+from demos.extended import content_record
+from demos.serialize import dumps
+
+
+__all__ = [
+    "SampleArtifact",
+]
+
+HERE = Path(__file__).parent.absolute()
+SAMPLE_SETS = ["images1", "images2"]
+
+
+class SampleArtifact:
+    """Versioned artifact with precomputed results for the bundled sample images"""
+
+    def __init__(self, root=HERE / "precomputed"):
+        # type: (Path) -> None
+        self.root = root
+        self.path = root / VERSIONS
+        self._samples = {}  # type: dict[str, dict] - content digest -> sample
+
+    def get(self, digest):
+        # type: (str) -> dict|None
+        """Return precomputed `file`, `iscc`, content `units` and `fields` and `thumbnail` path by digest"""
+        return self._samples.get(digest)
+
+    def isccs(self):
+        # type: () -> dict[str, str]
+        """Return ISCC per sample file path"""
+        return {sample["file"]: sample["iscc"] for sample in self._samples.values()}
+
+    def load(self):
+        # type: () -> bool
+        """Load artifact for the installed library versions"""
+        index_file = self.path / "index.json"
+        if not index_file.exists():
+            return False
+        index = orjson.loads(index_file.read_bytes())
+        if any("units" not in entry for entry in index):
+            log.info(f"Precomputed samples in {self.path} have an outdated format")
+            return False
+        for entry in index:
+            filepath = HERE / entry["file"]
+            digest = entry.get("digest") or content_digest(filepath)
+            self._samples[digest] = dict(
+                file=filepath.resolve().as_posix(),
+                iscc=entry["iscc"],
+                units=entry["units"],
+                fields=entry["fields"],
+                thumbnail=(self.path / entry["thumbnail"]).as_posix() if entry["thumbnail"] else None,
+            )
+        log.info(f"Loaded {len(index)} precomputed samples from {self.path}")
+        return True
+
+    def build(self, iscc_func):
+        """Compute all samples with `iscc_func` and replace artifacts of other versions"""
+        tmp_path = self.root / f".{VERSIONS}.tmp"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        (tmp_path / "thumbs").mkdir(parents=True)
+        index = []
+        for sample_set in SAMPLE_SETS:
+            for fp in sorted((HERE / sample_set).iterdir()):
+                imeta = iscc_func(fp.as_posix())
+                record = content_record(imeta)
+                data_url = record["fields"].pop("thumbnail", None)
+                thumbnail = None
+                if data_url:
+                    header, encoded = data_url.split(",", 1)
+                    thumbnail = f"thumbs/{sample_set}-{fp.stem}.jpg"
+                    (tmp_path / thumbnail).write_bytes(base64.b64decode(encoded))
+                index.append(
+                    dict(
+                        file=f"{sample_set}/{fp.name}",
+                        digest=content_digest(fp),
+                        iscc=imeta.iscc,
+                        units=record["units"],
+                        fields=record["fields"],
+                        thumbnail=thumbnail,
+                    )
+                )
+        (tmp_path / "index.json").write_bytes(dumps(index))
+        for old in self.root.iterdir():
+            if old != tmp_path:
+                shutil.rmtree(old, ignore_errors=True)
+        tmp_path.rename(self.path)
+        log.info(f"Built {len(index)} precomputed samples in {self.path}")
+
+    def ensure(self, iscc_func):
+        """Load the artifact or rebuild it in the background if the library versions changed"""
+        if self.load():
+            return
+
+        def rebuild():
+            try:
+                self.build(iscc_func)
+                self.load()
+            except Exception as e:
+                log.error(f"Failed to build precomputed samples: {e}")
+
+        threading.Thread(target=rebuild, name="sample-precompute", daemon=True).start()
+
+
+if __name__ == "__main__":
+    from demos.extended import iscc_semantic
+
+    SampleArtifact().build(iscc_semantic)
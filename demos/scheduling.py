@@ -0,0 +1,121 @@
+"""Admission control with separate concurrency pools for heavy and light events"""
+
+import asyncio
+import functools
+import inspect
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from statistics import quantiles
+import gradio as gr
+from loguru import logger as log
+from demos.options import opts
+
+
+__all__ = [
+    "Pool",
+    "HEAVY",
+    "LIGHT",
+    "metrics",
+]
+
+
+class Pool:
+    """Concurrency pool with a bounded wait queue that rejects requests over budget"""
+
+    def __init__(self, name, concurrency, max_queue):
+        # type: (str, int, int) -> None
+        self.name = name
+        self.concurrency = concurrency
+        self.max_queue = max_queue
+        self.waiting = 0
+        self.active = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.wait_sum = 0.0
+        self.recent_waits = deque(maxlen=1024)
+        self._semaphore = asyncio.Semaphore(concurrency)
+
+    @asynccontextmanager
+    async def admit(self):
+        """Wait for a free slot in the pool or fail fast if the wait queue is full"""
+        if self._semaphore.locked() and self.waiting >= self.max_queue:
+            self.rejected += 1
+            log.warning(f"Rejected request for {self.name} pool ({self.waiting} waiting)")
+            raise gr.Error(
+                f"Server busy: {self.waiting} requests are already waiting. Please try again shortly.",
+                duration=5,
+            )
+        self.waiting += 1
+        start = time.perf_counter()
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        wait = time.perf_counter() - start
+        self.admitted += 1
+        self.wait_sum += wait
+        self.recent_waits.append(wait)
+        self.active += 1
+        try:
+            yield
+        finally:
+            self.active -= 1
+            self._semaphore.release()
+
+    def limit(self, func):
+        """Decorate an event handler to run under admission control of this pool"""
+        if inspect.isasyncgenfunction(func):
+
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                async with self.admit():
+                    async for update in func(*args, **kwargs):
+                        yield update
+
+        elif inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                async with self.admit():
+                    return await func(*args, **kwargs)
+
+        else:
+
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                async with self.admit():
+                    return await asyncio.to_thread(func, *args, **kwargs)
+
+        return wrapper
+
+    def metrics(self):
+        # type: () -> list[str]
+        """Render pool state in Prometheus text exposition format"""
+        label = f'{{pool="{self.name}"}}'
+        lines = [
+            f"iscc_pool_concurrency{label} {self.concurrency}",
+            f"iscc_pool_active{label} {self.active}",
+            f"iscc_pool_waiting{label} {self.waiting}",
+            f"iscc_pool_rejected_total{label} {self.rejected}",
+            f"iscc_pool_queue_wait_seconds_sum{label} {self.wait_sum:.6f}",
+            f"iscc_pool_queue_wait_seconds_count{label} {self.admitted}",
+        ]
+        if len(self.recent_waits) >= 2:
+            cuts = quantiles(self.recent_waits, n=100, method="inclusive")
+            for q, value in (("0.5", cuts[49]), ("0.95", cuts[94]), ("0.99", cuts[98])):
+                lines.append(f'iscc_pool_queue_wait_seconds{{pool="{self.name}",quantile="{q}"}} {value:.6f}')
+        return lines
+
+
+HEAVY = Pool("heavy", opts.heavy_concurrency, opts.heavy_queue_size)
+LIGHT = Pool("light", opts.light_concurrency, opts.light_queue_size)
+
+
+def metrics():
+    # type: () -> str
+    """Collect metrics of all pools"""
+    lines = []
+    for pool in (HEAVY, LIGHT):
+        lines.extend(pool.metrics())
+    return "\n".join(lines) + "\n"
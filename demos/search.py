@@ -1,4 +1,18 @@
+import os
+import time
+from pathlib import Path
 import gradio as gr
+import iscc_core as ic
+from demos.cache import content_digest
+from demos.compare import SAMPLES, dist_to_sim
+from demos.corpus import CorpusIndex
+from demos.exact import EXACT_SEMANTIC, exact_or_compute, instance_code
+from demos.executor import run_blocking
+from demos.extended import iscc_semantic
+from demos.options import opts
+from demos.profiling import SAMPLER
+from demos.scheduling import HEAVY
+from demos.uploads import UPLOADS
 
 css = """
     #stats_box {font-family: monospace; font-size: 65%; height: 162px;}
@@ -14,13 +28,78 @@ iscc_theme = gr.themes.Default(
     radius_size=gr.themes.sizes.radius_none,
 )
 
+CORPUS = CorpusIndex.load(opts.search_index_path) if opts.search_index_path else None
+
+
+def corpus_index():
+    # type: () -> CorpusIndex
+    """Configured corpus or the precomputed sample sets (rebuilt until the samples are available)"""
+    global CORPUS
+    if CORPUS is None or (not opts.search_index_path and not len(CORPUS)):
+        isccs = SAMPLES.isccs()
+        CORPUS = CorpusIndex(list(isccs), list(isccs.values()))
+    return CORPUS
+
+
+def corpus_roots():
+    # type: () -> list[str]
+    """Directories that must be served for the result gallery"""
+    if CORPUS is None or not len(CORPUS):
+        return []
+    return [root] if (root := os.path.commonpath(CORPUS.names)) else []
+
+
+def caption(query, index, row, score):
+    # type: (str, CorpusIndex, int, float) -> str
+    units = dist_to_sim(ic.iscc_compare(query, index.isccs[row]))
+    details = " · ".join(f"{unit} {sim:.0%}" for unit, sim in units.items())
+    return f"{score:.0%} {Path(index.names[row]).name}\n{details}"
+
+
+@SAMPLER.profile
+async def search_similar(filepath, k):
+    """Stream the top-k most similar corpus items while the scan progresses"""
+    if not filepath:
+        yield [], ""
+        return
+    digest = await run_blocking(content_digest, filepath)
+    stored = await run_blocking(UPLOADS.acquire, filepath, digest)
+    try:
+        start = time.perf_counter()
+        index = corpus_index()
+        instance = instance_code(digest)
+        rows = index.exact(instance)
+        if rows:
+            # Exact duplicates need neither feature extraction nor a similarity scan
+            gallery = [
+                (index.names[row], f"100% {Path(index.names[row]).name}\nexact duplicate") for row in rows
+            ]
+            elapsed = (time.perf_counter() - start) * 1000
+            yield gallery[: int(k)], f"Found {len(rows)} exact duplicates by Instance-Code in {elapsed:.0f} ms"
+            return
+        query = (await run_blocking(exact_or_compute, EXACT_SEMANTIC, iscc_semantic, stored, digest)).iscc
+    finally:
+        UPLOADS.release(stored)
+    scan = index.scan(query, k=int(k))
+    start, first = time.perf_counter(), None
+    while (step := await run_blocking(next, scan, None)) is not None:
+        rows, scores, scanned = step
+        elapsed = (time.perf_counter() - start) * 1000
+        first = first or elapsed
+        gallery = [(index.names[row], caption(query, index, row, score)) for row, score in zip(rows, scores)]
+        status = f"Scanned {scanned:,} of {len(index):,} items in {elapsed:.0f} ms (first results after {first:.0f} ms)"
+        yield gallery, status
+
 
 with gr.Blocks(css=css, theme=iscc_theme) as demo:
     gr.HTML('<h1 style="color: #6aa84f; font-size: 250%;">ISCC SEARCH DEMO</h1>')
 
     with gr.Row(equal_height=True):
         with gr.Column():
-            in_image = gr.Image(type="pil")
+            in_file = gr.File(label="Query Media File", type="filepath")
+        with gr.Column():
+            in_topk = gr.Slider(label="Results", minimum=1, maximum=64, value=16, step=1)
+            out_status = gr.Markdown()
 
     gallery = gr.Gallery(
         value=None,
@@ -30,5 +109,13 @@ with gr.Blocks(css=css, theme=iscc_theme) as demo:
         preview=False,
     )
 
+    in_file.upload(
+        HEAVY.limit(search_similar),
+        inputs=[in_file, in_topk],
+        outputs=[gallery, out_status],
+        concurrency_limit=None,
+    )
+
 if __name__ == "__main__":
-    demo.launch()
+    SAMPLES.ensure(iscc_semantic)
+    demo.launch(allowed_paths=corpus_roots())
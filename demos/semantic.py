@@ -0,0 +1,265 @@
+"""Semantic feature helpers and batched inference on top of the iscc-sci ONNX model.
+
+`ISCC_PLAYGROUND_SEMANTIC_MODEL` selects the model variant used for inference:
+
+- `reference` - the iscc-sci model as distributed
+- `optimized` - the graph with all ONNX Runtime optimizations applied once and stored, so sessions
+  load without optimizing again
+- `int8` - weights dynamically quantized to int8
+
+Derived models are looked up in `demos/models/` first. The int8 model needs the `onnx` and
+`ml_dtypes` packages (not runtime dependencies) to convert, so it is built at deploy time and
+shipped there with `uv run --with onnx --with ml_dtypes python -m demos.semantic int8`. The
+optimized model is created next to the reference model on first use if missing. Check the Semantic-Code drift of a variant with
+`python -m benchmarks.semantic_variants`.
+"""
+
+import importlib.util
+import os
+import queue
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+import numpy as np
+import onnxruntime as rt
+from PIL import Image
+from loguru import logger as log
+import iscc_core as ic
+import iscc_sci as sci
+from iscc_sci import code_semantic_image as csi
+from demos.options import opts
+from demos.profiling import SAMPLER
+
+
+__all__ = [
+    "VARIANTS",
+    "model_path",
+    "build_model",
+    "model",
+    "frames_to_array",
+    "embed_batch",
+    "semantic_code",
+    "SemanticBatcher",
+    "BATCHER",
+    "code_image_semantic",
+    "code_image_semantic_batch",
+]
+
+MODEL_SIZE = 512
+VARIANTS = ("reference", "optimized", "int8")
+
+MODEL_DIR = Path(__file__).parent / "models"
+
+_sessions = {}  # type: dict[str, rt.InferenceSession]
+_sessions_lock = threading.Lock()
+
+
+def model_path(variant):
+    # type: (str) -> Path
+    """Path of the model file of a variant (shipped or derived from the reference model on first use)"""
+    if variant not in VARIANTS:
+        raise ValueError(f"Unknown semantic model variant {variant!r} - use one of {VARIANTS}")
+    reference = Path(sci.get_model())
+    if variant == "reference":
+        return reference
+    name = f"{reference.stem}.{variant}.onnx"
+    for path in (MODEL_DIR / name, reference.with_name(name)):
+        if path.exists():
+            return path
+    if variant == "int8" and importlib.util.find_spec("onnx") is None:
+        raise RuntimeError(
+            f"The int8 semantic model {MODEL_DIR / name} is missing - build it with "
+            "`uv run --with onnx --with ml_dtypes python -m demos.semantic int8`"
+        )
+    return build_model(variant, reference.with_name(name))
+
+
+def build_model(variant, target=None):
+    # type: (str, Path|None) -> Path
+    """Derive the model file of a variant from the reference model (default target: `MODEL_DIR`)"""
+    reference = Path(sci.get_model())
+    target = target or MODEL_DIR / f"{reference.stem}.{variant}.onnx"
+    target.parent.mkdir(parents=True, exist_ok=True)
+    log.info(f"Creating {variant} semantic model {target}")
+    # Unique name in the target folder, so concurrent builds never write to the same file
+    with tempfile.NamedTemporaryFile(
+        dir=target.parent, prefix=f".{target.stem}-", suffix=".onnx", delete=False
+    ) as tmp:
+        tmp_path = Path(tmp.name)
+    try:
+        if variant == "int8":
+            from onnxruntime.quantization import QuantType, quantize_dynamic
+
+            quantize_dynamic(reference, tmp_path, weight_type=QuantType.QInt8)
+        elif variant == "optimized":
+            options = rt.SessionOptions()
+            options.graph_optimization_level = rt.GraphOptimizationLevel.ORT_ENABLE_ALL
+            options.optimized_model_filepath = tmp_path.as_posix()
+            rt.InferenceSession(reference.as_posix(), options, providers=["CPUExecutionProvider"])
+        else:
+            raise ValueError(f"Cannot derive semantic model variant {variant!r}")
+        os.replace(tmp_path, target)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+    return target
+
+
+def model(variant=None):
+    # type: (str|None) -> rt.InferenceSession
+    """Load and cache the inference session of a model variant (default: configured variant)"""
+    variant = variant or opts.semantic_model
+    with _sessions_lock:
+        if variant in _sessions:
+            return _sessions[variant]
+        threads = opts.semantic_intra_threads, opts.semantic_inter_threads
+        if variant == "reference" and threads == (0, 0):
+            session = csi.model()  # Share the session with direct iscc-sci calls
+        else:
+            options = rt.SessionOptions()
+            options.intra_op_num_threads, options.inter_op_num_threads = threads
+            if variant == "optimized":
+                options.graph_optimization_level = rt.GraphOptimizationLevel.ORT_DISABLE_ALL
+            start = time.perf_counter()
+            session = rt.InferenceSession(
+                model_path(variant).as_posix(), options, providers=["CPUExecutionProvider"]
+            )
+            log.info(
+                f"Loaded {variant} semantic model in {time.perf_counter() - start:.2f}s "
+                f"(intra/inter-op threads {threads[0] or 'auto'}/{threads[1] or 'auto'})"
+            )
+        _sessions[variant] = session
+        return session
+
+
+def frames_to_array(frames):
+    # type: (np.ndarray) -> np.ndarray
+    """Normalize RGB frames with shape (N, 512, 512, 3) to model input with shape (N, 3, 512, 512)"""
+    arr = frames.astype(np.float32) / 255.0
+    arr = (arr - 0.5) / 0.5
+    return np.ascontiguousarray(np.transpose(arr, (0, 3, 1, 2)), dtype=np.float32)
+
+
+def embed_batch(arr, variant=None):
+    # type: (np.ndarray, str|None) -> np.ndarray
+    """Run semantic model inference on a batch with shape (N, 3, 512, 512) and return (N, dim) features"""
+    engine = model(variant)
+    model_input = engine.get_inputs()[0]
+    if model_input.shape[0] == 1:
+        # Model exported with a fixed batch size of one
+        return np.concatenate(
+            [engine.run(None, {model_input.name: arr[i : i + 1]})[0] for i in range(len(arr))]
+        )
+    return engine.run(None, {model_input.name: arr})[0]
+
+
+def semantic_code(features, subtype, bits=64):
+    # type: (np.ndarray, int, int) -> str
+    """Encode a feature vector as Semantic-Code of the given SubType"""
+    digest = csi.binarize(features)[: bits // 8]
+    return "ISCC:" + ic.encode_component(ic.MT.SEMANTIC, subtype, ic.VS.V0, bits, digest)
+
+
+def preprocess_file(fp):
+    # type: (str) -> np.ndarray
+    """Load and preprocess an image file to model input with shape (1, 3, 512, 512)"""
+    with Image.open(fp) as image:
+        return sci.preprocess_image(image)
+
+
+class SemanticBatcher:
+    """
+    Collect Semantic-Code requests across callers and run them as batched inference.
+
+    Preprocessing starts in a thread pool as soon as a request is submitted. A single worker
+    thread gathers requests for up to `window` seconds (or `max_batch` requests), runs one
+    inference call for the whole batch and fans the results back out to the callers.
+    """
+
+    def __init__(self, max_batch=16, window=0.01, workers=4):
+        # type: (int, float, int) -> None
+        self.max_batch = max_batch
+        self.window = window
+        self._queue = queue.Queue()
+        self._preprocess = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="sci-preprocess")
+        self._worker = None
+        self._lock = threading.Lock()
+
+    def submit(self, fp, bits=64):
+        # type: (str, int) -> Future
+        """Queue an image file for Semantic-Code generation"""
+        future = Future()
+        self._queue.put((self._preprocess.submit(preprocess_file, fp), bits, future))
+        with self._lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="sci-batcher", daemon=True)
+                self._worker.start()
+        return future
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.max_batch:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            self._process(batch)
+
+    def _process(self, batch):
+        with SAMPLER.track("semantic_batch"):
+            self._process_batch(batch)
+
+    def _process_batch(self, batch):
+        ready = []
+        for preprocessed, bits, future in batch:
+            try:
+                ready.append((preprocessed.result(), bits, future))
+            except Exception as e:
+                future.set_exception(e)
+        if not ready:
+            return
+        try:
+            features = embed_batch(np.concatenate([arr for arr, _, _ in ready]))
+        except Exception as e:
+            for _, _, future in ready:
+                future.set_exception(e)
+            return
+        log.debug(f"Semantic inference batch of {len(ready)} images")
+        for (_, bits, future), feature in zip(ready, features):
+            future.set_result(
+                {"iscc": semantic_code(feature, ic.ST_CC.IMAGE, bits), "features": feature.tolist()}
+            )
+
+
+BATCHER = SemanticBatcher(
+    max_batch=opts.semantic_batch_size,
+    window=opts.semantic_batch_window_ms / 1000,
+    workers=opts.executor_workers,
+)
+
+
+def code_image_semantic(fp, bits=64):
+    # type: (str, int) -> dict
+    """Drop-in for `sci.code_image_semantic` that joins the shared inference batch"""
+    return BATCHER.submit(fp, bits).result()
+
+
+def code_image_semantic_batch(fps, bits=64, return_exceptions=False):
+    # type: (list[str], int, bool) -> list[dict|Exception]
+    """Generate Semantic-Codes for a batch job of image files (failures in place with `return_exceptions`)"""
+    futures = [BATCHER.submit(fp, bits) for fp in fps]
+    if not return_exceptions:
+        return [future.result() for future in futures]
+    return [future.exception() or future.result() for future in futures]
+
+
+if __name__ == "__main__":
+    for name in sys.argv[1:] or ["int8"]:
+        build_model(name)
@@ -0,0 +1,54 @@
+"""Fast JSON serialization of ISCC metadata for display and download"""
+
+from pathlib import Path
+import orjson
+from blake3 import blake3
+from demos.options import opts
+
+
+__all__ = [
+    "dumps",
+    "split_thumbnail",
+    "MetaPayload",
+]
+
+
+def dumps(obj, pretty=False):
+    # type: (object, bool) -> bytes
+    """Serialize to JSON bytes, compact by default"""
+    return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if pretty else 0)
+
+
+def split_thumbnail(imeta):
+    # type: (idk.IsccMeta) -> tuple[str|None, dict]
+    """Return thumbnail data-url and metadata dict without thumbnail (never serialized)"""
+    return imeta.thumbnail, imeta.dict(exclude_unset=False, by_alias=True, exclude={"thumbnail"})
+
+
+class MetaPayload:
+    """Metadata serialized once and shared by the JSON display and the download file"""
+
+    def __init__(self, metadata, pretty=None):
+        # type: (dict, bool|None) -> None
+        self.data = dumps(metadata, opts.metadata_pretty if pretty is None else pretty)
+
+    @property
+    def text(self):
+        # type: () -> str
+        return self.data.decode("utf-8")
+
+    def save(self, filename="iscc-metadata.json"):
+        # type: (str) -> str
+        """
+        Write serialized bytes to a content-addressed download file and return its path.
+
+        The file goes to the Gradio upload folder, so Gradio serves it without a copy and
+        `delete_cache` expires it.
+        """
+        from gradio.utils import get_upload_folder  # Keep gradio out of worker processes
+
+        filepath = Path(get_upload_folder()) / blake3(self.data).hexdigest() / filename
+        if not filepath.exists():
+            filepath.parent.mkdir(parents=True, exist_ok=True)
+            filepath.write_bytes(self.data)
+        return filepath.as_posix()
@@ -0,0 +1,104 @@
+"""ISCC-UNITs at 64, 128 or 256 bits and comparison of units with mixed lengths.
+
+The ISCC-CODE composite truncates every unit to 64 bits, so longer codes are kept as separate
+ISCC-UNITs and passed around space separated. Data-, Instance-, Image- and Text-Codes and the image
+Semantic-Code are generated again at the requested length. Units the SDK only produces at its
+global default length (Meta, Audio, Video) stay at 64 bits. Two units are compared over the bits
+both of them have, which is the dimension handed to `hamming_to_similarity`.
+"""
+
+from PIL import Image
+import iscc_core as ic
+import iscc_sdk as idk
+from demos.memory import guard_decode
+from demos.semantic import code_image_semantic
+
+
+__all__ = [
+    "BITS",
+    "split_units",
+    "long_units",
+    "long_units_guarded",
+    "expand_units",
+    "compare_units",
+]
+
+BITS = (64, 128, 256)
+
+
+def split_units(iscc):
+    # type: (str) -> list[str]
+    """Decompose an ISCC-CODE or space separated ISCC-UNITs into ISCC-UNITs"""
+    return [unit for code in iscc.split() for unit in ic.iscc_decompose(code)]
+
+
+def long_units(filepath, iscc, bits):
+    # type: (str, str, int) -> list[str]
+    """Generate the units of an (extended) ISCC-CODE of `filepath` again with `bits` length"""
+    units = []
+    for unit in split_units(iscc):
+        code = ic.Code(unit)
+        if code.maintype == ic.MT.DATA:
+            with open(filepath, "rb") as stream:
+                units.append(ic.gen_data_code_v0(stream, bits=bits)["iscc"])
+        elif code.maintype == ic.MT.INSTANCE:
+            with open(filepath, "rb") as stream:
+                units.append(ic.gen_instance_code_v0(stream, bits=bits)["iscc"])
+        elif code.maintype == ic.MT.CONTENT and code.subtype == ic.ST_CC.IMAGE:
+            pixels = idk.image_normalize(Image.open(filepath))
+            units.append(ic.gen_image_code_v0(pixels, bits=bits)["iscc"])
+        elif code.maintype == ic.MT.CONTENT and code.subtype == ic.ST_CC.TEXT:
+            units.append(ic.gen_text_code_v0(idk.text_extract(filepath), bits=bits)["iscc"])
+        elif code.maintype == ic.MT.SEMANTIC and code.subtype == ic.ST_CC.IMAGE:
+            units.append(code_image_semantic(filepath, bits=bits)["iscc"])
+        else:
+            units.append(f"ISCC:{unit}")
+    return units
+
+
+def long_units_guarded(filepath, iscc, bits):
+    # type: (str, str, int) -> str
+    """Space separated `long_units` of the original or downscaled file according to the decode budget"""
+    if bits == 64:
+        return iscc
+    with guard_decode(filepath) as processed:
+        return " ".join(long_units(processed, iscc, bits))
+
+
+def expand_units(iscc, units):
+    # type: (str, list[str]) -> str
+    """Space separated units of `iscc` with longer versions from `units` where available"""
+    longer = {}
+    for unit in units:
+        code = ic.Code(unit)
+        longer[(code.maintype, code.subtype)] = unit
+    result = []
+    for unit in split_units(iscc):
+        code = ic.Code(unit)
+        result.append(longer.get((code.maintype, code.subtype), f"ISCC:{unit}"))
+    return " ".join(result)
+
+
+def compare_units(a, b):
+    # type: (str, str) -> tuple[dict, dict]
+    """
+    Calculate hamming distances of compatible units like `ic.iscc_compare` for units of any length.
+
+    :return: Distances (and instance match) per unit and the number of bits compared per unit
+    """
+    units_a = [ic.Code(unit) for unit in split_units(a)]
+    units_b = [ic.Code(unit) for unit in split_units(b)]
+    result, dims = {}, {}
+    for ca in units_a:
+        for cb in units_b:
+            if (ca.maintype, ca.subtype, ca.version) != (cb.maintype, cb.subtype, cb.version):
+                continue
+            bits = int(min(ca.length, cb.length))
+            head_a, head_b = ca.hash_bytes[: bits // 8], cb.hash_bytes[: bits // 8]
+            if ca.maintype == ic.MT.INSTANCE:
+                result["instance_match"] = head_a == head_b
+            else:
+                key = ca.maintype.name.lower() + "_dist"
+                result[key] = (int.from_bytes(head_a, "big") ^ int.from_bytes(head_b, "big")).bit_count()
+                dims[key] = bits
+    return result, dims
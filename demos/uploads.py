@@ -0,0 +1,152 @@
+"""Bounded upload store with content deduplication, byte budget and TTL eviction"""
+
+import os
+import shutil
+import tempfile
+import threading
+import time
+from os.path import basename
+from pathlib import Path
+from gradio.utils import get_upload_folder
+from loguru import logger as log
+from demos.cache import content_digest
+from demos.options import opts
+
+
+__all__ = [
+    "UploadStore",
+    "UPLOADS",
+]
+
+
+class UploadStore:
+    """
+    Content-addressed store for uploaded media files.
+
+    Uploads are moved out of the Gradio temp folder into `<root>/<digest>/<filename>` so that
+    re-uploads of the same content share one copy (hard linked if the filename differs). Files
+    that are not used by a running request are evicted when they are older than `ttl` seconds or
+    when the store exceeds `budget` bytes (least recently used first).
+    """
+
+    def __init__(self, root, budget, ttl):
+        # type: (str|Path, int, int) -> None
+        self.root = Path(root)
+        self.budget = budget
+        self.ttl = ttl
+        self.evictions = 0
+        self.dedup_hits = 0
+        self._entries = {}  # digest -> [path, size, last access]
+        self._pins = {}  # digest -> number of requests using the file
+        self._lock = threading.Lock()
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._scan()
+
+    def _scan(self):
+        """Rebuild index from files left by a previous run"""
+        for entry in self.root.iterdir():
+            if entry.name.startswith("."):
+                shutil.rmtree(entry, ignore_errors=True)  # Staging folder of an interrupted move
+                continue
+            files = [fp for fp in entry.iterdir() if fp.is_file()] if entry.is_dir() else []
+            if files:
+                stat = files[0].stat()
+                self._entries[entry.name] = [files[0], stat.st_size, stat.st_mtime]
+
+    @property
+    def usage(self):
+        # type: () -> int
+        """Bytes currently stored"""
+        return sum(size for _, size, _ in self._entries.values())
+
+    def acquire(self, filepath, digest=None):
+        # type: (str, str|None) -> str
+        """Move an upload into the store, pin it for the running request and return the stored path"""
+        if not Path(filepath).resolve().is_relative_to(Path(get_upload_folder()).resolve()):
+            return filepath  # Bundled samples and other files we do not own
+        digest = digest or content_digest(filepath)
+        target = self.root / digest / basename(filepath)
+        with self._lock:
+            stored = digest in self._entries
+            if stored:
+                self.dedup_hits += 1
+                self._checkout(digest, target)
+        if stored:
+            os.remove(filepath)
+            return target.as_posix()
+        # The move is a copy if the store is on another device, so it runs outside the lock
+        staging = Path(tempfile.mkdtemp(prefix=".staging-", dir=self.root))
+        try:
+            staged = Path(shutil.move(filepath, staging / target.name))
+            with self._lock:
+                if digest in self._entries:
+                    self.dedup_hits += 1  # Stored by a concurrent upload of the same content
+                else:
+                    target.parent.mkdir(exist_ok=True)
+                    staged.rename(target)
+                    self._entries[digest] = [target, target.stat().st_size, 0.0]
+                self._checkout(digest, target)
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+        return target.as_posix()
+
+    def _checkout(self, digest, target):
+        # type: (str, Path) -> None
+        """Pin a stored file for a request (hard linked if the filename differs) and evict others"""
+        entry = self._entries[digest]
+        if not target.exists():
+            # Same content under another name (the Meta-Code may depend on it): link, don't copy
+            os.link(entry[0], target)
+        entry[2] = time.time()
+        self._pins[digest] = self._pins.get(digest, 0) + 1
+        self._evict()
+
+    def release(self, stored):
+        # type: (str) -> None
+        """Unpin a stored file after the request finished"""
+        digest = Path(stored).parent.name
+        with self._lock:
+            if digest in self._pins:
+                self._pins[digest] -= 1
+                if not self._pins[digest]:
+                    del self._pins[digest]
+            self._evict()
+
+    def evict(self):
+        """Drop expired and over-budget files (called periodically, so an idle server frees space too)"""
+        with self._lock:
+            self._evict()
+
+    def _evict(self):
+        """Drop expired files, then least recently used files until the store fits the budget"""
+        now = time.time()
+        candidates = sorted(
+            (item for item in self._entries.items() if item[0] not in self._pins), key=lambda item: item[1][2]
+        )
+        usage = self.usage
+        for digest, (path, size, last_access) in candidates:
+            if usage <= self.budget and now - last_access <= self.ttl:
+                continue
+            shutil.rmtree(path.parent, ignore_errors=True)
+            del self._entries[digest]
+            usage -= size
+            self.evictions += 1
+            log.debug(f"Evicted upload {path.name} ({size} bytes)")
+
+    def metrics(self):
+        # type: () -> list[str]
+        """Render store state in Prometheus text exposition format"""
+        return [
+            f"iscc_uploads_bytes {self.usage}",
+            f"iscc_uploads_budget_bytes {self.budget}",
+            f"iscc_uploads_files {len(self._entries)}",
+            f"iscc_uploads_evictions_total {self.evictions}",
+            f"iscc_uploads_dedup_hits_total {self.dedup_hits}",
+        ]
+
+
+UPLOADS = UploadStore(
+    root=opts.upload_dir or Path(tempfile.gettempdir()) / "iscc-playground-uploads",
+    budget=opts.upload_budget_mb * 1024 * 1024,
+    ttl=opts.upload_ttl,
+)
@@ -0,0 +1,143 @@
+"""Video ISCC-CODE with Semantic-Code from a single decoding pass"""
+
+import re
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from os.path import basename
+from pathlib import Path
+from secrets import token_hex
+import numpy as np
+import iscc_core as ic
+import iscc_sdk as idk
+from loguru import logger as log
+from demos.semantic import MODEL_SIZE, embed_batch, frames_to_array, semantic_code
+
+
+__all__ = [
+    "video_duration",
+    "video_frame_size",
+    "video_signature_and_frames",
+    "code_iscc_video",
+]
+
+
+def video_header(fp):
+    # type: (str) -> bytes
+    """Container and stream description as printed by ffmpeg (no decoding)"""
+    return idk.run_ffmpeg(["-hide_banner", "-i", fp, "-t", "0", "-f", "null", "-"]).stderr
+
+
+def video_duration(fp):
+    # type: (str) -> float|None
+    """Read video duration in seconds from container metadata (no decoding)"""
+    match = re.search(rb"Duration: (\d+):(\d+):(\d+(?:\.\d+)?)", video_header(fp))
+    if not match:
+        return None
+    hours, minutes, seconds = match.groups()
+    return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+
+def video_frame_size(fp):
+    # type: (str) -> tuple[int, int]|None
+    """Read width and height of the first video stream from container metadata (no decoding)"""
+    match = re.search(rb"Video: [^\n]*?, (\d+)x(\d+)", video_header(fp))
+    return (int(match.group(1)), int(match.group(2))) if match else None
+
+
+def video_signature_and_frames(fp, frame_budget):
+    # type: (str, int) -> tuple[bytes, np.ndarray]
+    """
+    Decode video once to extract the MPEG-7 signature and at most `frame_budget` sampled frames.
+
+    The decoded stream is split in ffmpeg: one branch feeds the signature filter for the
+    Video-Code, the other is subsampled to `frame_budget` frames evenly spread over the
+    duration and scaled to the semantic model input size.
+
+    :return: Raw MP7 signature and RGB frames with shape (N, 512, 512, 3)
+    """
+    duration = video_duration(fp)
+    sample_fps = frame_budget / duration if duration else 1.0
+    if idk.sdk_opts.video_fps:
+        sample_fps = min(sample_fps, idk.sdk_opts.video_fps)
+
+    sigfile_path = Path(tempfile.mkdtemp(), token_hex(16) + ".bin")
+    sigfile_path_escaped = sigfile_path.as_posix().replace(":", "\\\\:")
+    decode = f"fps=fps={idk.sdk_opts.video_fps}," if idk.sdk_opts.video_fps else ""
+    graph = (
+        f"[0:v]{decode}split=2[a][b];"
+        f"[a]signature=format=binary:filename={sigfile_path_escaped}[sig];"
+        f"[b]fps=fps={sample_fps:.6f},scale={MODEL_SIZE}:{MODEL_SIZE}:flags=bilinear,format=rgb24[frames]"
+    )
+    args = [
+        "-i",
+        fp,
+        "-filter_complex",
+        graph,
+        "-map",
+        "[sig]",
+        "-f",
+        "null",
+        "-",
+        "-map",
+        "[frames]",
+        "-frames:v",
+        str(frame_budget),  # Stop at the budget even if the duration (and so the sample rate) is unknown
+        "-f",
+        "rawvideo",
+        "pipe:1",
+    ]
+    result = idk.run_ffmpeg(args)
+
+    with open(sigfile_path, "rb") as sig:
+        sigdata = sig.read()
+    sigfile_path.unlink()
+
+    frame_size = MODEL_SIZE * MODEL_SIZE * 3
+    count = min(len(result.stdout) // frame_size, frame_budget)
+    frames = np.frombuffer(result.stdout, dtype=np.uint8, count=count * frame_size)
+    log.debug(f"Sampled {count} frames at {sample_fps:.4f} fps from {basename(fp)}")
+    return sigdata, frames.reshape(count, MODEL_SIZE, MODEL_SIZE, 3)
+
+
+def code_iscc_video(fp, frame_budget, bits=64):
+    # type: (str, int, int) -> idk.IsccMeta
+    """
+    Generate ISCC-CODE for video extended with a Semantic-Code.
+
+    Mirrors `idk.code_iscc` but computes the Video-Code and the semantic features from the
+    same decoding pass. Semantic inference runs as one batch over the sampled frames, so its
+    cost is bounded by `frame_budget` instead of the video length.
+
+    :param str fp: Filepath of video file
+    :param int frame_budget: Maximum number of frames used for semantic inference
+    :param int bits: Bit-length of the Semantic-Code
+    """
+    mediatype, mode = idk.mediatype_and_mode(fp)
+    with ThreadPoolExecutor() as executor:
+        instance = executor.submit(idk.code_instance, fp)
+        data = executor.submit(idk.code_data, fp)
+        meta = executor.submit(idk.code_meta, fp)
+        thumbnail = executor.submit(idk.video_thumbnail, fp) if idk.sdk_opts.create_thumbnail else None
+        sigdata, frames = video_signature_and_frames(fp, frame_budget)
+    instance, data, meta = instance.result(), data.result(), meta.result()
+
+    frame_sigs = [tuple(frame.vector.tolist()) for frame in idk.read_mp7_signature(sigdata)]
+    content = ic.gen_video_code_v0(frame_sigs, bits=idk.core_opts.video_bits)
+    content.update(mediatype=mediatype, mode=mode, type_="VideoObject")
+    if thumbnail is not None and thumbnail.result() is not None:
+        content["thumbnail"] = idk.image_to_data_url(thumbnail.result())
+
+    units = [meta.iscc, content["iscc"], data.iscc, instance.iscc]
+    if len(frames):
+        features = embed_batch(frames_to_array(frames)).mean(axis=0)
+        units.append(semantic_code(features, ic.ST_CC.VIDEO, bits=bits))
+    iscc_code = ic.gen_iscc_code_v0(units)
+
+    # Merge ISCC Metadata
+    iscc_meta = dict(filename=basename(fp))
+    iscc_meta.update(instance.dict())
+    iscc_meta.update(data.dict())
+    iscc_meta.update(content)
+    iscc_meta.update(meta.dict())
+    iscc_meta.update(iscc_code)
+    return idk.IsccMeta.construct(**iscc_meta)
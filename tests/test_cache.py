@@ -0,0 +1,101 @@
+import io
+import threading
+import time
+import pytest
+from demos.cache import RedisCache, RespStandIn, SqliteCache, read_reply
+
+
+@pytest.fixture(scope="module")
+def stand_in():
+    server = RespStandIn(("127.0.0.1", 0))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def redis(stand_in):
+    cache = RedisCache(*stand_in.server_address, db=1)
+    cache._command("FLUSHDB")
+    return cache
+
+
+def test_redis_cache_roundtrip(redis):
+    redis.set("key", b"value \r\n with CRLF")
+    assert redis.get("key") == b"value \r\n with CRLF"
+
+
+def test_redis_cache_missing_key(redis):
+    assert redis.get("missing") is None
+
+
+def test_redis_cache_ttl(redis, stand_in):
+    redis.ttl = 60
+    redis.set("key", b"value")
+    value, expires = stand_in.data[b"key"]
+    assert value == b"value"
+    assert expires > time.time()
+
+
+def test_redis_cache_error_reply(redis):
+    with pytest.raises(RuntimeError, match="unknown command"):
+        redis._command("HGETALL", "key")
+
+
+def test_redis_cache_reconnects(redis):
+    redis.set("key", b"value")
+    redis._local.sock.close()
+    assert redis.get("key") == b"value"
+
+
+@pytest.mark.parametrize(
+    "reply, expected",
+    [
+        (b"+OK\r\n", b"OK"),
+        (b":42\r\n", 42),
+        (b"$5\r\nhello\r\n", b"hello"),
+        (b"$-1\r\n", None),
+        (b"*2\r\n$1\r\na\r\n:1\r\n", [b"a", 1]),
+        (b"*-1\r\n", None),
+    ],
+)
+def test_read_reply(reply, expected):
+    assert read_reply(io.BytesIO(reply)) == expected
+
+
+def test_read_reply_errors():
+    with pytest.raises(RuntimeError, match="WRONGTYPE"):
+        read_reply(io.BytesIO(b"-WRONGTYPE wrong kind of value\r\n"))
+    with pytest.raises(ConnectionError):
+        read_reply(io.BytesIO(b""))
+    with pytest.raises(ValueError):
+        read_reply(io.BytesIO(b"?what\r\n"))
+
+
+def test_sqlite_cache_roundtrip(tmp_path):
+    cache = SqliteCache((tmp_path / "cache.db").as_posix())
+    assert cache.get("key") is None
+    cache.set("key", b"value")
+    assert cache.get("key") == b"value"
+
+
+def test_sqlite_cache_evicts_least_recently_used(tmp_path):
+    cache = SqliteCache((tmp_path / "cache.db").as_posix(), budget=1000, evict_every=1)
+    for i in range(8):
+        cache.set(f"key{i}", b"x" * 200)
+        cache.get("key0")  # Keep the first entry in use
+    assert cache.evictions
+    assert cache.get("key0") is not None
+    assert cache.get("key1") is None
+    assert cache.get("key7") is not None
+
+
+def test_sqlite_cache_expires_entries(tmp_path):
+    cache = SqliteCache((tmp_path / "cache.db").as_posix(), ttl=60, evict_every=1)
+    cache.set("old", b"value")
+    cache._conn().execute("UPDATE iscc_cache SET last_access = last_access - 120")
+    assert cache.get("old") is None
+    cache.set("new", b"value")
+    assert cache._conn().execute("SELECT COUNT(*) FROM iscc_cache").fetchone()[0] == 1
@@ -0,0 +1,45 @@
+import io
+import random
+import iscc_core as ic
+import numpy as np
+import pytest
+from demos.cdc import cdc_offsets, chunk_file, minhash_256
+
+
+def reference_offsets(data, avg_chunk_size):
+    # type: (bytes, int) -> list[int]
+    offsets, pos = [], 0
+    for chunk in ic.alg_cdc_chunks(data, utf32=False, avg_chunk_size=avg_chunk_size):
+        pos += len(chunk)
+        offsets.append(pos)
+    return offsets
+
+
+@pytest.mark.parametrize("avg_chunk_size", [256, 1024])
+def test_cdc_offsets_match_iscc_core(avg_chunk_size):
+    rng = np.random.default_rng(avg_chunk_size)
+    data = np.concatenate([rng.integers(0, 256, 200_000, dtype=np.uint8), np.zeros(20_000, dtype=np.uint8)])
+    assert cdc_offsets(data, avg_chunk_size) == reference_offsets(data.tobytes(), avg_chunk_size)
+
+
+@pytest.mark.parametrize("size", [1, 7, 5000])
+def test_minhash_256_matches_iscc_core(size):
+    features = [random.getrandbits(32) for _ in range(size)]
+    assert minhash_256(features) == ic.alg_minhash_256(features)
+
+
+def test_chunk_file_limit(tmp_path):
+    data = np.random.default_rng(0).integers(0, 256, 300_000, dtype=np.uint8).tobytes()
+    path = tmp_path / "data.bin"
+    path.write_bytes(data)
+    full = chunk_file(path.as_posix())
+    assert full["data_code"] == ic.gen_data_code_v0(io.BytesIO(data))["iscc"]
+    part = chunk_file(path.as_posix(), limit=100_000)
+    assert part["data_code"] == ic.gen_data_code_v0(io.BytesIO(data[:100_000]))["iscc"]
+    assert (part["size"], part["chunked"]) == (300_000, 100_000)
+
+
+def test_chunk_file_empty(tmp_path):
+    path = tmp_path / "empty.bin"
+    path.write_bytes(b"")
+    assert chunk_file(path.as_posix())["data_code"] == ic.gen_data_code_v0(io.BytesIO(b""))["iscc"]
@@ -0,0 +1,20 @@
+import pytest
+from demos.chunker import diff_text
+
+
+@pytest.mark.parametrize("text_a", [" ", "\n\n"])
+def test_diff_text_whitespace_only(text_a):
+    highlighted_a, highlighted_b, score = diff_text(text_a, "hello", 64)
+    assert score.startswith("**Similarity:** 0.00%")
+    assert [label for _, label in highlighted_b] == ["changed"]
+
+
+def test_diff_text_both_whitespace_only():
+    highlighted_a, highlighted_b, score = diff_text(" ", "\n\n", 64)
+    assert score == "**Similarity:** 100.00% | **A contained in B:** 100.00% | **B contained in A:** 100.00%"
+
+
+def test_diff_text_identical():
+    highlighted_a, highlighted_b, score = diff_text("hello world", "hello world", 64)
+    assert score.startswith("**Similarity:** 100.00%")
+    assert highlighted_a == highlighted_b
@@ -0,0 +1,113 @@
+import io
+import iscc_core as ic
+import iscc_sdk as idk
+import pytest
+from blake3 import blake3
+from demos.cache import SqliteCache
+from demos.exact import ExactStore, exact_or_compute, instance_code
+from demos.extended import compose_iscc, content_record
+
+
+def instance(seed):
+    # type: (int) -> str
+    return ic.gen_instance_code_v0(io.BytesIO(f"file {seed}".encode()), bits=64)["iscc"]
+
+
+def record(size=100):
+    # type: (int) -> dict
+    return dict(units=[], fields=dict(thumbnail="x" * size))
+
+
+@pytest.mark.parametrize("bits", [64, 128, 256])
+def test_instance_code_from_digest(bits):
+    data = b"file content" * 1000
+    expected = ic.gen_instance_code_v0(io.BytesIO(data), bits=bits)["iscc"]
+    assert instance_code(blake3(data).hexdigest(), bits) == expected
+
+
+def test_exact_store_roundtrip(tmp_path):
+    store = ExactStore(tmp_path / "exact.db", budget=2**20, ttl=3600, capacity=16)
+    assert store.get(instance(0)) is None
+    store.put(instance(0), record())
+    assert store.get(instance(0)) == record()
+    reopened = ExactStore(tmp_path / "exact.db", budget=2**20, ttl=3600, capacity=16)
+    assert reopened.get(instance(0)) == record()
+    assert reopened.count == 1
+
+
+def test_exact_store_evicts_least_recently_used(tmp_path):
+    store = ExactStore(tmp_path / "exact.db", budget=1000, ttl=3600, capacity=16)
+    for seed in range(8):
+        store.put(instance(seed), record())
+        store.get(instance(0))  # Keep the first record in use
+    assert store.usage <= store.budget
+    assert store.evictions
+    assert store.get(instance(0)) is not None
+    assert store.get(instance(1)) is None
+
+
+def test_exact_store_expires_records(tmp_path):
+    store = ExactStore(tmp_path / "exact.db", budget=2**20, ttl=60, capacity=16)
+    store.put(instance(0), record())
+    store._conn.execute("UPDATE exact SET last_access = last_access - 120")
+    store.put(instance(1), record())
+    assert store.get(instance(0)) is None
+    assert store.count == 1
+
+
+def test_content_record_drops_request_specific_fields():
+    meta = ic.gen_meta_code_v0("secret.jpg", "private description")["iscc"]
+    units = [meta, instance(0), ic.gen_data_code_v0(io.BytesIO(b"data"), bits=64)["iscc"]]
+    imeta = idk.IsccMeta.construct(
+        iscc=ic.gen_iscc_code(units)["iscc"],
+        filename="secret.jpg",
+        name="secret",
+        description="private description",
+        filesize=4,
+        mediatype="image/jpeg",
+    )
+    result = content_record(imeta)
+    assert result["fields"] == dict(filesize=4, mediatype="image/jpeg")
+    assert sorted(result["units"]) == sorted(units[1:])
+
+
+def test_compose_iscc_uses_current_request_meta():
+    content = [instance(0), ic.gen_data_code_v0(io.BytesIO(b"data"), bits=64)["iscc"]]
+    meta = idk.IsccMeta.construct(**ic.gen_meta_code_v0("upload"))
+    imeta = compose_iscc("/tmp/store/upload.jpg", content, dict(filesize=4), meta=meta)
+    assert imeta.filename == "upload.jpg"
+    assert imeta.name == "upload"
+    assert imeta.filesize == 4
+    assert imeta.iscc == ic.gen_iscc_code([meta.iscc] + content)["iscc"]
+
+
+def test_exact_or_compute_reuses_content_record(tmp_path, monkeypatch):
+    monkeypatch.setattr(idk, "code_meta", lambda fp: idk.IsccMeta.construct(**ic.gen_meta_code_v0(fp)))
+    store = ExactStore(tmp_path / "exact.db", budget=2**20, ttl=3600, capacity=16)
+    content = [instance(0), ic.gen_data_code_v0(io.BytesIO(b"data"), bits=64)["iscc"]]
+    calls = []
+
+    def compute(filepath, digest=None):
+        calls.append(digest)
+        return compose_iscc(filepath, content, dict(filesize=4))
+
+    (tmp_path / "a.txt").write_bytes(b"data")
+    (tmp_path / "b.txt").write_bytes(b"data")
+    digest = blake3(b"data").hexdigest()
+    first = exact_or_compute(store, compute, (tmp_path / "a.txt").as_posix(), digest)
+    second = exact_or_compute(store, compute, (tmp_path / "b.txt").as_posix(), digest)
+    assert calls == [digest]
+    assert (first.filename, second.filename) == ("a.txt", "b.txt")
+    assert first.iscc != second.iscc
+    assert ic.iscc_decompose(first.iscc)[1:] == ic.iscc_decompose(second.iscc)[1:]
+
+
+def test_exact_store_shares_records_through_cache(tmp_path):
+    cache = SqliteCache(tmp_path / "cache.db")
+    first = ExactStore(tmp_path / "a" / "exact.db", budget=2**20, ttl=3600, capacity=16, cache=cache)
+    second = ExactStore(tmp_path / "b" / "exact.db", budget=2**20, ttl=3600, capacity=16, cache=cache)
+    first.put(instance(0), record())
+    assert second.get(instance(0)) == record()
+    assert second.shared_hits == 1
+    assert second.get(instance(0)) == record()
+    assert second.hits == 1  # Kept locally after the shared hit
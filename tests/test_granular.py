@@ -0,0 +1,50 @@
+import random
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+import iscc_core as ic
+import pytest
+from demos.granular import chunk_features, parallel_chunk_features, text_chunk_features
+from demos.options import opts
+
+
+def random_words(size, seed=0):
+    # type: (int, int) -> str
+    rnd = random.Random(seed)
+    words = ["".join(rnd.choice("abcdefghij") for _ in range(rnd.randint(2, 9))) for _ in range(500)]
+    text = []
+    while sum(map(len, text)) < size:
+        text.append(rnd.choice(words) + rnd.choice([" ", " ", " ", "\n"]))
+    return "".join(text)
+
+
+TEXTS = {
+    "words": random_words(40_000),
+    "constant": "a" * 40_000,  # No content-defined boundaries, segments never resync
+    "repetitive": "lorem ipsum " * 3_500,
+}
+
+
+@lru_cache(maxsize=None)
+def serial(name, chunk_size):
+    # type: (str, int) -> tuple[list[str], list[str]]
+    return chunk_features(ic.text_clean(TEXTS[name]), chunk_size)
+
+
+@pytest.fixture(scope="module")
+def pool():
+    with ThreadPoolExecutor(max_workers=5) as executor:
+        yield executor
+
+
+@pytest.mark.parametrize("workers", [2, 3, 5])
+@pytest.mark.parametrize("chunk_size", [16, 32])
+@pytest.mark.parametrize("name", list(TEXTS))
+def test_parallel_chunk_features_equals_serial(pool, name, chunk_size, workers):
+    cleaned = ic.text_clean(TEXTS[name])
+    assert parallel_chunk_features(cleaned, chunk_size, workers, pool) == serial(name, chunk_size)
+
+
+def test_text_chunk_features_parallel_equals_serial(monkeypatch):
+    monkeypatch.setattr(opts, "text_parallel_workers", 3)
+    monkeypatch.setattr(opts, "text_parallel_min_size", 1)
+    assert text_chunk_features(TEXTS["words"], 16) == serial("words", 16)
@@ -0,0 +1,60 @@
+import asyncio
+import time
+import pytest
+from demos.executor import run_blocking
+from demos.profiling import SAMPLER
+
+
+def busy_phase():
+    deadline = time.perf_counter() + 0.1
+    while time.perf_counter() < deadline:
+        pass
+    return 1
+
+
+@pytest.fixture
+def sampler(monkeypatch):
+    monkeypatch.setattr(SAMPLER, "rate", 1.0)
+    SAMPLER.reset()
+    yield SAMPLER
+    SAMPLER.reset()
+
+
+async def drain(updates):
+    # Advance each step in its own task like Gradio does
+    results = []
+    while True:
+        try:
+            results.append(await asyncio.create_task(updates.__anext__()))
+        except StopAsyncIteration:
+            return results
+
+
+def test_async_generator_handler_records_executor_stages(sampler):
+    @SAMPLER.profile
+    async def handler():
+        yield await run_blocking(busy_phase)
+        yield await run_blocking(busy_phase) + 1
+
+    assert asyncio.run(drain(handler())) == [1, 2]
+    assert sampler.calls["handler"] == 1
+    stacks = sampler.collapsed("handler")
+    assert "handler;[busy_phase];" in stacks
+
+
+def test_coroutine_handler_records_executor_stages(sampler):
+    @SAMPLER.profile
+    async def handler():
+        return await run_blocking(busy_phase)
+
+    assert asyncio.run(handler()) == 1
+    assert "handler;[busy_phase];" in sampler.collapsed("handler")
+
+
+def test_unsampled_handler_records_nothing():
+    @SAMPLER.profile
+    async def handler():
+        return await run_blocking(busy_phase)
+
+    assert asyncio.run(handler()) == 1
+    assert SAMPLER.collapsed("handler") == ""
@@ -0,0 +1,47 @@
+import io
+import iscc_core as ic
+import iscc_sdk as idk
+from demos.cache import content_digest
+from demos.extended import compose_iscc
+from demos.samples import HERE, SampleArtifact
+
+
+def fake_iscc(filepath):
+    # type: (str) -> idk.IsccMeta
+    with open(filepath, "rb") as stream:
+        data = stream.read()
+    meta = ic.gen_meta_code_v0("Sample Title")
+    units = [
+        meta["iscc"],
+        ic.gen_data_code_v0(io.BytesIO(data))["iscc"],
+        ic.gen_instance_code_v0(io.BytesIO(data))["iscc"],
+    ]
+    return idk.IsccMeta.construct(
+        iscc=ic.gen_iscc_code(units)["iscc"],
+        name=meta["name"],
+        filename=filepath.rsplit("/", 1)[-1],
+        filesize=len(data),
+        thumbnail="data:image/jpeg;base64,AAAA",
+    )
+
+
+def test_sample_lookup_keeps_only_content(tmp_path, monkeypatch):
+    monkeypatch.setattr(idk, "code_meta", lambda fp: idk.IsccMeta.construct(**ic.gen_meta_code_v0("upload")))
+    artifact = SampleArtifact(root=tmp_path)
+    artifact.build(fake_iscc)
+    assert artifact.load()
+    bundled = HERE / "images1" / "pope1.jpg"
+    sample = artifact.get(content_digest(bundled))
+    assert sample["file"] == bundled.as_posix()
+    assert "thumbnail" not in sample["fields"]
+    assert all(ic.Code(unit).maintype != ic.MT.META for unit in sample["units"])
+    imeta = compose_iscc("/tmp/upload/renamed.jpg", sample["units"], sample["fields"])
+    assert (imeta.name, imeta.filename) == ("upload", "renamed.jpg")
+    assert imeta.iscc != sample["iscc"]
+
+
+def test_outdated_sample_artifact_is_rebuilt(tmp_path):
+    artifact = SampleArtifact(root=tmp_path)
+    artifact.path.mkdir(parents=True)
+    (artifact.path / "index.json").write_text('[{"file": "images1/pope1.jpg", "iscc": "", "metadata": {}}]')
+    assert not artifact.load()
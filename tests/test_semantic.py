@@ -0,0 +1,39 @@
+import importlib.util
+import shutil
+from pathlib import Path
+import onnxruntime as rt
+import pytest
+import iscc_sci as sci
+from demos import semantic
+
+TINY_MODEL = Path(rt.__file__).parent / "datasets" / "mul_1.onnx"
+
+
+@pytest.fixture
+def reference(tmp_path, monkeypatch):
+    path = tmp_path / "sci" / "model.onnx"
+    path.parent.mkdir()
+    shutil.copy(TINY_MODEL, path)
+    monkeypatch.setattr(sci, "get_model", lambda: path.as_posix())
+    monkeypatch.setattr(semantic, "MODEL_DIR", tmp_path / "models")
+    return path
+
+
+def test_optimized_model_is_derived_next_to_reference(reference):
+    path = semantic.model_path("optimized")
+    assert path == reference.with_name("model.optimized.onnx")
+    rt.InferenceSession(path.as_posix(), providers=["CPUExecutionProvider"])
+    assert sorted(fp.name for fp in reference.parent.iterdir()) == ["model.onnx", "model.optimized.onnx"]
+
+
+def test_shipped_model_is_preferred(reference):
+    shipped = semantic.MODEL_DIR / "model.int8.onnx"
+    shipped.parent.mkdir()
+    shutil.copy(TINY_MODEL, shipped)
+    assert semantic.model_path("int8") == shipped
+
+
+@pytest.mark.skipif(importlib.util.find_spec("onnx") is not None, reason="onnx is installed")
+def test_missing_int8_model_names_build_command(reference):
+    with pytest.raises(RuntimeError, match="python -m demos.semantic int8"):
+        semantic.model_path("int8")
@@ -0,0 +1,16 @@
+import io
+import iscc_core as ic
+from demos.units import expand_units
+
+
+def test_expand_units_replaces_matching_units():
+    data = b"some file content" * 100
+    meta = ic.gen_meta_code_v0("name")["iscc"]
+    short = [
+        meta,
+        ic.gen_data_code_v0(io.BytesIO(data))["iscc"],
+        ic.gen_instance_code_v0(io.BytesIO(data))["iscc"],
+    ]
+    long = [ic.gen_data_code_v0(io.BytesIO(data), bits=256)["iscc"]]
+    expanded = expand_units(ic.gen_iscc_code(short)["iscc"], long).split()
+    assert sorted(expanded) == sorted([meta, long[0], short[2]])
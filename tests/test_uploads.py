@@ -0,0 +1,49 @@
+import time
+import pytest
+import demos.uploads
+from demos.uploads import UploadStore
+
+
+@pytest.fixture
+def upload_folder(tmp_path, monkeypatch):
+    folder = tmp_path / "gradio"
+    folder.mkdir()
+    monkeypatch.setattr(demos.uploads, "get_upload_folder", lambda: folder.as_posix())
+    return folder
+
+
+def upload(folder, name, data):
+    # type: (Path, str, bytes) -> str
+    path = folder / name
+    path.write_bytes(data)
+    return path.as_posix()
+
+
+def test_acquire_moves_and_deduplicates(tmp_path, upload_folder):
+    store = UploadStore(tmp_path / "store", budget=2**20, ttl=3600)
+    first = store.acquire(upload(upload_folder, "a.jpg", b"content"))
+    second = store.acquire(upload(upload_folder, "b.jpg", b"content"))
+    assert not list(upload_folder.iterdir())
+    assert open(first, "rb").read() == open(second, "rb").read() == b"content"
+    assert store.dedup_hits == 1
+    assert len(store._entries) == 1
+    assert not [p for p in (tmp_path / "store").iterdir() if p.name.startswith(".")]
+
+
+def test_evict_frees_expired_files_without_requests(tmp_path, upload_folder):
+    store = UploadStore(tmp_path / "store", budget=2**20, ttl=60)
+    stored = store.acquire(upload(upload_folder, "a.jpg", b"content"))
+    store.release(stored)
+    store._entries[next(iter(store._entries))][2] = time.time() - 120
+    store.evict()
+    assert not store._entries
+    assert store.evictions == 1
+
+
+def test_pinned_files_survive_eviction(tmp_path, upload_folder):
+    store = UploadStore(tmp_path / "store", budget=0, ttl=0)
+    stored = store.acquire(upload(upload_folder, "a.jpg", b"content"))
+    store.evict()
+    assert open(stored, "rb").read() == b"content"
+    store.release(stored)
+    assert not store._entries